@@ -3,7 +3,8 @@ FastAPI application for Carelum AI services
 """
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 import logging
 import os
 from pathlib import Path
@@ -16,11 +17,17 @@ load_dotenv(dotenv_path=env_path)
 from app.routes import predict, bot, users, admin, sessions, children, alerts, gps, messages
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+# INFO in production; LOG_LEVEL=DEBUG turns on the per-request debug logs in the routes
+log_level_name = (os.getenv("LOG_LEVEL") or "INFO").upper()
+log_level = logging.getLevelName(log_level_name)  # int for known names, else a "Level X" string
+logging.basicConfig(level=log_level if isinstance(log_level, int) else logging.INFO)
 logger = logging.getLogger(__name__)
+if not isinstance(log_level, int):
+    logger.warning("⚠️ Unknown LOG_LEVEL %r, using INFO", log_level_name)
 
 # Initialize Supabase client
-from app.utils.database import init_supabase, get_supabase
+from app.utils.database import init_supabase, get_supabase, close_http_client
+from app.utils.error_handler import AppError, handle_error
 
 SUPABASE_URL = os.getenv("SUPABASE_URL", "")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY", "")
@@ -30,7 +37,7 @@ if SUPABASE_URL and SUPABASE_ANON_KEY:
         init_supabase(SUPABASE_URL, SUPABASE_ANON_KEY)
         logger.info("✅ Supabase client initialized")
     except Exception as e:
-        logger.warning(f"⚠️ Failed to initialize Supabase client: {e}")
+        logger.warning("⚠️ Failed to initialize Supabase client: %s", e)
 else:
     logger.warning("⚠️ Supabase credentials not found. Set SUPABASE_URL and SUPABASE_ANON_KEY environment variables.")
 
@@ -41,7 +48,9 @@ supabase = get_supabase()
 app = FastAPI(
     title="Carelum API",
     description="API for Carelum childcare platform - AI services, user management, and admin operations",
-    version="1.0.0"
+    version="1.0.0",
+    # Serialize every response with orjson instead of the stdlib json encoder
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -51,14 +60,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],  # readable by browser (Expo web) clients
 )
 
+# Compress larger JSON bodies (sitter and session lists repeat the same keys in every
+# object); small payloads like /health aren't worth the CPU
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Exception handler for AppError
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
-    from app.utils.error_handler import AppError, handle_error
-    from fastapi import HTTPException
-    
     # Let FastAPI handle HTTPException (from handle_error conversions)
     if isinstance(exc, HTTPException):
         raise exc
@@ -67,14 +78,14 @@ async def global_exception_handler(request, exc):
     if isinstance(exc, AppError):
         http_exc = handle_error(exc)
         # HTTPException.detail is already a dict with the error structure
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=http_exc.status_code,
             content=http_exc.detail
         )
     
     # Log and handle other exceptions
-    logger.error(f"Unhandled exception: {exc}", exc_info=True)
-    return JSONResponse(
+    logger.error("Unhandled exception: %s", exc, exc_info=True)
+    return ORJSONResponse(
         status_code=500,
         content={
             "success": False,
@@ -85,6 +96,11 @@ async def global_exception_handler(request, exc):
         }
     )
 
+# Release the shared Supabase connection pool on shutdown
+@app.on_event("shutdown")
+def shutdown_http_client():
+    close_http_client()
+
 # Include routers
 app.include_router(predict.router, prefix="/predict", tags=["prediction"])
 app.include_router(bot.router, prefix="/bot", tags=["bot"])
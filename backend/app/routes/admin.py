@@ -4,11 +4,13 @@ Admin endpoints for user management
 from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel
 from typing import Optional, List
-from decimal import Decimal
+from datetime import datetime
 
 from app.utils.auth import verify_admin, CurrentUser
 from app.utils.error_handler import handle_error, AppError
 from app.utils.database import get_supabase
+from app.utils.users import user_columns, user_fields, user_row_to_dict
+from app.routes.users import invalidate_cached_user
 
 router = APIRouter()
 
@@ -56,6 +58,16 @@ class AdminStatsResponse(BaseModel):
     activeSessions: int
 
 
+# Only the columns UserResponse shows (no location or activity fields)
+_ADMIN_USER_FIELDS = user_fields(UserResponse.model_fields)
+_ADMIN_USER_COLUMNS = user_columns(_ADMIN_USER_FIELDS)
+
+
+def _user_row_to_response(user_data: dict) -> UserResponse:
+    """Convert a users row to UserResponse without re-validating DB data"""
+    return UserResponse.model_construct(**user_row_to_dict(user_data, fields=_ADMIN_USER_FIELDS))
+
+
 @router.get("/users", response_model=List[UserResponse])
 async def get_all_users(
     role: Optional[str] = Query(None, description="Filter by role: parent, sitter, admin"),
@@ -76,7 +88,7 @@ async def get_all_users(
             )
         
         # Build query
-        query = supabase.table("users").select("*")
+        query = supabase.table("users").select(_ADMIN_USER_COLUMNS)
         
         # Apply role filter if provided
         if role:
@@ -90,27 +102,7 @@ async def get_all_users(
         response = query.execute()
         
         # Convert to response format
-        users = []
-        for user_data in (response.data or []):
-            users.append(UserResponse(
-                id=user_data["id"],
-                email=user_data["email"],
-                displayName=user_data.get("display_name", ""),
-                role=user_data.get("role", "parent"),
-                preferredLanguage=user_data.get("preferred_language", "en"),
-                userNumber=user_data.get("user_number"),
-                phoneNumber=user_data.get("phone_number"),
-                profileImageUrl=user_data.get("photo_url"),
-                theme=user_data.get("theme", "auto"),
-                isVerified=user_data.get("is_verified", False),
-                verificationStatus=user_data.get("verification_status"),
-                hourlyRate=float(user_data["hourly_rate"]) if user_data.get("hourly_rate") else None,
-                bio=user_data.get("bio"),
-                createdAt=user_data["created_at"],
-                updatedAt=user_data.get("updated_at", user_data["created_at"])
-            ))
-        
-        return users
+        return [_user_row_to_response(user_data) for user_data in (response.data or [])]
         
     except AppError:
         raise
@@ -136,7 +128,7 @@ async def get_user_by_id(
                 status_code=503
             )
         
-        response = supabase.table("users").select("*").eq("id", user_id).single().execute()
+        response = supabase.table("users").select(_ADMIN_USER_COLUMNS).eq("id", user_id).single().execute()
         
         if not response.data:
             raise AppError(
@@ -147,23 +139,7 @@ async def get_user_by_id(
         
         user_data = response.data
         
-        return UserResponse(
-            id=user_data["id"],
-            email=user_data["email"],
-            displayName=user_data.get("display_name", ""),
-            role=user_data.get("role", "parent"),
-            preferredLanguage=user_data.get("preferred_language", "en"),
-            userNumber=user_data.get("user_number"),
-            phoneNumber=user_data.get("phone_number"),
-            profileImageUrl=user_data.get("photo_url"),
-            theme=user_data.get("theme", "auto"),
-            isVerified=user_data.get("is_verified", False),
-            verificationStatus=user_data.get("verification_status"),
-            hourlyRate=float(user_data["hourly_rate"]) if user_data.get("hourly_rate") else None,
-            bio=user_data.get("bio"),
-            createdAt=user_data["created_at"],
-            updatedAt=user_data.get("updated_at", user_data["created_at"])
-        )
+        return _user_row_to_response(user_data)
         
     except AppError:
         raise
@@ -211,16 +187,15 @@ async def update_user(
         if updates.verificationStatus is not None:
             update_data["verification_status"] = updates.verificationStatus
         if updates.hourlyRate is not None:
-            update_data["hourly_rate"] = Decimal(str(updates.hourlyRate))
+            update_data["hourly_rate"] = updates.hourlyRate
         if updates.bio is not None:
             update_data["bio"] = updates.bio
         
         # Add updated_at timestamp
-        from datetime import datetime
         update_data["updated_at"] = datetime.utcnow().isoformat()
         
         # Update user
-        response = supabase.table("users").update(update_data).eq("id", user_id).execute()
+        response = supabase.table("users").update(update_data).eq("id", user_id).select(_ADMIN_USER_COLUMNS).execute()
         
         if not response.data:
             raise AppError(
@@ -230,24 +205,9 @@ async def update_user(
             )
         
         user_data = response.data[0] if isinstance(response.data, list) else response.data
+        invalidate_cached_user(user_id)
         
-        return UserResponse(
-            id=user_data["id"],
-            email=user_data["email"],
-            displayName=user_data.get("display_name", ""),
-            role=user_data.get("role", "parent"),
-            preferredLanguage=user_data.get("preferred_language", "en"),
-            userNumber=user_data.get("user_number"),
-            phoneNumber=user_data.get("phone_number"),
-            profileImageUrl=user_data.get("photo_url"),
-            theme=user_data.get("theme", "auto"),
-            isVerified=user_data.get("is_verified", False),
-            verificationStatus=user_data.get("verification_status"),
-            hourlyRate=float(user_data["hourly_rate"]) if user_data.get("hourly_rate") else None,
-            bio=user_data.get("bio"),
-            createdAt=user_data["created_at"],
-            updatedAt=user_data.get("updated_at", user_data["created_at"])
-        )
+        return _user_row_to_response(user_data)
         
     except AppError:
         raise
@@ -275,6 +235,7 @@ async def delete_user(
         
         # Delete from users table (cascade will handle related data)
         response = supabase.table("users").delete().eq("id", user_id).execute()
+        invalidate_cached_user(user_id)
         
         return {
             "success": True,
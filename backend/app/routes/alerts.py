@@ -5,6 +5,7 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
+import orjson
 
 from app.utils.auth import verify_token, CurrentUser
 from app.utils.error_handler import handle_error, AppError
@@ -53,8 +54,7 @@ def db_to_alert_response(alert_data: dict) -> AlertResponse:
     location = alert_data.get("location")
     if isinstance(location, str):
         try:
-            import json
-            location = json.loads(location)
+            location = orjson.loads(location)
         except:
             location = None
     
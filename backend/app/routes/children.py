@@ -5,11 +5,11 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
+from supabase import Client
 
-from app.utils.auth import verify_token, CurrentUser, security
+from app.utils.auth import verify_token, get_authed_supabase, CurrentUser
 from app.utils.error_handler import handle_error, AppError
-from app.utils.database import get_supabase, get_supabase_with_auth
-from fastapi.security import HTTPAuthorizationCredentials
+from app.utils.database import get_supabase
 
 router = APIRouter()
 
@@ -123,23 +123,12 @@ def verify_child_access(child_data: dict, user: CurrentUser) -> bool:
 @router.get("", response_model=List[ChildResponse])
 async def get_parent_children(
     current_user: CurrentUser = Depends(verify_token),
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    supabase: Client = Depends(get_authed_supabase)
 ):
     """
     Get current user's children (parent only)
     """
     try:
-        # CRITICAL: Use Supabase client with user's auth token for RLS to work!
-        auth_token = credentials.credentials
-        supabase = get_supabase_with_auth(auth_token)
-        
-        if not supabase:
-            raise AppError(
-                code="AUTH_ERROR",
-                message="Failed to authenticate with database",
-                status_code=500
-            )
-        
         # Only parents can get their children
         if current_user.role != "parent":
             raise AppError(
@@ -180,22 +169,8 @@ async def get_child_by_id(
                 status_code=503
             )
         
-        # Query without .single() to avoid error when child doesn't exist
-        # .single() throws an exception if 0 rows, so we check the result instead
-        try:
-            response = supabase.table("children").select("*").eq("id", child_id).single().execute()
-            child_data = response.data
-        except Exception as query_error:
-            # Check if it's a "0 rows" error (child not found)
-            error_str = str(query_error)
-            if "0 rows" in error_str or "PGRST116" in error_str or "Cannot coerce" in error_str:
-                raise AppError(
-                    code="CHILD_NOT_FOUND",
-                    message="Child not found",
-                    status_code=404
-                )
-            # Re-raise other errors
-            raise
+        response = supabase.table("children").select("*").eq("id", child_id).maybe_single().execute()
+        child_data = response.data if response else None
         
         if not child_data:
             raise AppError(
@@ -504,10 +479,10 @@ async def update_child_instructions(
                 status_code=403
             )
         
-        # Check if instructions exist
-        existing = supabase.table("child_instructions").select("*").eq("child_id", child_id).single().execute()
-        
         update_data = {
+            "child_id": child_id,
+            # current_user.id for parents (verify_child_access); admins save under the parent
+            "parent_id": child_data["parent_id"],
             "feeding_schedule": updates.feedingSchedule,
             "nap_schedule": updates.napSchedule,
             "medication": updates.medication,
@@ -517,14 +492,8 @@ async def update_child_instructions(
             "updated_at": datetime.utcnow().isoformat()
         }
         
-        if existing.data:
-            # Update existing
-            response = supabase.table("child_instructions").update(update_data).eq("child_id", child_id).select().execute()
-        else:
-            # Create new
-            update_data["child_id"] = child_id
-            update_data["parent_id"] = current_user.id
-            response = supabase.table("child_instructions").insert(update_data).select().execute()
+        # Insert or update in one round trip against UNIQUE(child_id, parent_id); returns the row
+        response = supabase.table("child_instructions").upsert(update_data, on_conflict="child_id,parent_id").execute()
         
         if not response.data:
             raise AppError(
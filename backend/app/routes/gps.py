@@ -4,7 +4,6 @@ GPS tracking endpoints
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Optional, List
-from decimal import Decimal
 from datetime import datetime
 
 from app.utils.auth import verify_token, CurrentUser
@@ -129,11 +128,12 @@ async def track_location(
         # Insert GPS location
         insert_data = {
             "session_id": location_data.sessionId,
-            "latitude": Decimal(str(location_data.latitude)),
-            "longitude": Decimal(str(location_data.longitude)),
-            "accuracy": Decimal(str(location_data.accuracy)) if location_data.accuracy else None,
-            "speed": Decimal(str(location_data.speed)) if location_data.speed else None,
-            "heading": Decimal(str(location_data.heading)) if location_data.heading else None,
+            # Plain floats; PostgREST casts JSON numbers to the NUMERIC columns
+            "latitude": location_data.latitude,
+            "longitude": location_data.longitude,
+            "accuracy": location_data.accuracy,
+            "speed": location_data.speed,
+            "heading": location_data.heading,
         }
         
         response = supabase.table("gps_tracking").insert(insert_data).select().execute()
@@ -1,23 +1,34 @@
 """
 Session management endpoints
 """
-from fastapi import APIRouter, HTTPException, Depends, Query
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List
-from decimal import Decimal
-from datetime import datetime
-import json
+from datetime import datetime, timezone
+import logging
+import re
+import orjson
+from cachetools import TTLCache
+from supabase import Client
 
-from app.utils.auth import verify_token, CurrentUser, security
-from app.utils.error_handler import handle_error, AppError
-from app.utils.database import get_supabase, get_supabase_with_auth
-from fastapi.security import HTTPAuthorizationCredentials
+from app.utils.auth import verify_token, get_authed_supabase, CurrentUser
+from app.utils.error_handler import handle_error, is_permission_error, AppError
+from app.utils.database import run_query
+from app.utils.etag import etag_matches, row_etag, rows_etag
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# (user_id, session_id) pairs recently answered 404; RLS visibility can change elsewhere, so only for seconds
+_missing_sessions = TTLCache(maxsize=10_000, ttl=5)
+
 
 class TimeSlot(BaseModel):
     """Time slot model for multi-day sessions"""
+    model_config = ConfigDict(populate_by_name=True, extra='ignore')
+    
     date: str
     startTime: str
     endTime: str
@@ -26,6 +37,8 @@ class TimeSlot(BaseModel):
 
 class SessionResponse(BaseModel):
     """Session response model"""
+    model_config = ConfigDict(populate_by_name=True, extra='ignore')
+    
     id: str
     parentId: str
     sitterId: Optional[str] = None
@@ -52,6 +65,14 @@ class SessionResponse(BaseModel):
 
 class CreateSessionRequest(BaseModel):
     """Request model for creating a session"""
+    model_config = ConfigDict(
+        populate_by_name=True,
+        extra='ignore',
+        str_strip_whitespace=False,
+        validate_assignment=False,
+        revalidate_instances='never',
+    )
+    
     parentId: str
     sitterId: Optional[str] = None
     childId: str
@@ -68,6 +89,14 @@ class CreateSessionRequest(BaseModel):
 
 class UpdateSessionRequest(BaseModel):
     """Request model for updating a session"""
+    model_config = ConfigDict(
+        populate_by_name=True,
+        extra='ignore',
+        str_strip_whitespace=False,
+        validate_assignment=False,
+        revalidate_instances='never',
+    )
+    
     status: Optional[str] = None
     endTime: Optional[str] = None
     location: Optional[str] = None
@@ -77,54 +106,58 @@ class UpdateSessionRequest(BaseModel):
     cancellationReason: Optional[str] = None  # For cancellation tracking
 
 
-def db_to_session_response(session_data: dict) -> SessionResponse:
-    """Convert database session to API response"""
-    # Parse child_ids JSONB field if present
-    child_ids = None
-    if session_data.get("child_ids"):
-        if isinstance(session_data["child_ids"], str):
-            try:
-                child_ids = json.loads(session_data["child_ids"])
-            except:
-                child_ids = None
-        elif isinstance(session_data["child_ids"], list):
-            child_ids = session_data["child_ids"]
-    
-    # Parse time_slots JSONB field if present
-    time_slots = None
-    if session_data.get("time_slots"):
-        if isinstance(session_data["time_slots"], str):
-            try:
-                time_slots = json.loads(session_data["time_slots"])
-            except:
-                time_slots = None
-        elif isinstance(session_data["time_slots"], list):
-            time_slots = session_data["time_slots"]
-    
-    return SessionResponse(
-        id=session_data["id"],
-        parentId=session_data["parent_id"],
-        sitterId=session_data.get("sitter_id"),
-        childId=session_data["child_id"],
-        childIds=child_ids,  # Array of child IDs
-        status=session_data["status"],
-        startTime=session_data["start_time"],
-        endTime=session_data.get("end_time"),
-        location=session_data.get("location"),
-        hourlyRate=float(session_data["hourly_rate"]) if session_data.get("hourly_rate") else None,
-        totalAmount=float(session_data["total_amount"]) if session_data.get("total_amount") else None,
-        notes=session_data.get("notes"),
-        searchScope=session_data.get("search_scope"),
-        maxDistanceKm=float(session_data["max_distance_km"]) if session_data.get("max_distance_km") else None,
-        timeSlots=time_slots,  # Array of time slots
-        expiresAt=session_data.get("expires_at"),  # Request expiration time
-        cancelledAt=session_data.get("cancelled_at"),
-        cancelledBy=session_data.get("cancelled_by"),
-        cancellationReason=session_data.get("cancellation_reason"),
-        completedAt=session_data.get("completed_at"),
-        createdAt=session_data["created_at"],
-        updatedAt=session_data.get("updated_at", session_data["created_at"])
-    )
+# (db column, API key) pairs copied verbatim into the response payload
+_KEY_MAP = (
+    ("id", "id"),
+    ("parent_id", "parentId"),
+    ("sitter_id", "sitterId"),
+    ("child_id", "childId"),
+    ("status", "status"),
+    ("start_time", "startTime"),
+    ("end_time", "endTime"),
+    ("location", "location"),
+    ("notes", "notes"),
+    ("search_scope", "searchScope"),
+    ("expires_at", "expiresAt"),
+    ("cancelled_at", "cancelledAt"),
+    ("cancelled_by", "cancelledBy"),
+    ("cancellation_reason", "cancellationReason"),
+    ("completed_at", "completedAt"),
+    ("created_at", "createdAt"),
+)
+
+# Explicit projection for list reads: exactly the columns db_row_to_api_dict consumes
+_SESSION_COLUMNS = ",".join(
+    [db for db, _ in _KEY_MAP]
+    + ["child_ids", "time_slots", "hourly_rate", "total_amount", "max_distance_km", "updated_at"]
+)
+
+
+def _maybe_parse_jsonb(value) -> Optional[list]:
+    """Return a JSONB list column as a list (PostgREST may hand back a string)"""
+    # Supabase normally returns native lists; only string fallbacks get parsed
+    if isinstance(value, list):
+        return value or None
+    if isinstance(value, (str, bytes)) and value:
+        try:
+            return orjson.loads(value)
+        except orjson.JSONDecodeError:
+            return None
+    return None
+
+
+def db_row_to_api_dict(row: dict) -> dict:
+    """Convert a database session row to the JSON-ready SessionResponse payload"""
+    data = {api: row.get(db) for db, api in _KEY_MAP}
+    data["childIds"] = _maybe_parse_jsonb(row.get("child_ids"))
+    data["timeSlots"] = _maybe_parse_jsonb(row.get("time_slots"))
+    g = row.get
+    # `is not None` keeps a stored 0 as 0.0 instead of dropping it to null
+    data["hourlyRate"] = float(v) if (v := g("hourly_rate")) is not None else None
+    data["totalAmount"] = float(v) if (v := g("total_amount")) is not None else None
+    data["maxDistanceKm"] = float(v) if (v := g("max_distance_km")) is not None else None
+    data["updatedAt"] = g("updated_at") or data["createdAt"]
+    return data
 
 
 def verify_session_access(session_data: dict, user: CurrentUser) -> bool:
@@ -137,86 +170,207 @@ def verify_session_access(session_data: dict, user: CurrentUser) -> bool:
     )
 
 
-def validate_status_transition(current_status: str, new_status: str, user_role: str, session_data: dict) -> tuple[bool, str]:
-    """
-    Validate session status transition (Uber-like state machine)
-    Returns: (is_valid, error_message)
-    """
-    # Define valid transitions
-    valid_transitions = {
-        'requested': ['accepted', 'cancelled'],  # Can be accepted by sitter or cancelled by anyone
-        'accepted': ['active', 'cancelled'],     # Can start (active) or cancel
-        'active': ['completed', 'cancelled'],    # Can complete or cancel
-        'completed': [],                          # Terminal state
-        'cancelled': [],                          # Terminal state
-        'pending': ['accepted', 'cancelled']     # Legacy support
-    }
-    
+# Insert error classifiers, compiled once and matched without lower-casing the message
+_ERR_STATUS = re.compile(r"status|check|constraint", re.IGNORECASE)
+_ERR_MISSING_COLUMN = re.compile(r"(?i:child_ids|time_slots)|PGRST204")
+
+
+def _translate_insert_error(err) -> AppError:
+    """Map a Supabase insert failure (exception or message) to the matching AppError"""
+    if isinstance(err, Exception):
+        # postgrest's APIError carries the PostgREST message separately
+        err = getattr(err, "message", None) or (err.args[0] if err.args else err)
+    error_str = str(err)
+    if _ERR_STATUS.search(error_str):
+        return AppError(
+            code="INVALID_STATUS",
+            message=f"Invalid status value 'requested'. The database constraint may not allow this status yet. Please run UPDATE_SESSIONS_STATUS.sql in Supabase. Error: {error_str}",
+            status_code=400
+        )
+    if is_permission_error(error_str):
+        return AppError(
+            code="PERMISSION_DENIED",
+            message=f"Database insert blocked by RLS policies. Make sure you're using an authenticated Supabase client. Error: {error_str}",
+            status_code=403
+        )
+    return AppError(
+        code="CREATE_FAILED",
+        message=f"Failed to create session: {error_str}",
+        status_code=500
+    )
+
+
+# Session state machine: allowed next statuses for each current status
+_VALID_TRANSITIONS = {
+    'requested': frozenset({'accepted', 'cancelled'}),  # Can be accepted by sitter or cancelled by anyone
+    'accepted': frozenset({'active', 'cancelled'}),     # Can start (active) or cancel
+    'active': frozenset({'completed', 'cancelled'}),    # Can complete or cancel
+    'completed': frozenset(),                           # Terminal state
+    'cancelled': frozenset(),                           # Terminal state
+    'pending': frozenset({'accepted', 'cancelled'}),    # Legacy support
+}
+_TERMINAL = frozenset({'completed', 'cancelled'})
+
+# Request visibility scopes and the radius options offered for 'nearby'
+_VALID_SCOPES = frozenset({'invite', 'nearby', 'city', 'nationwide'})
+_NEARBY_DISTANCES_KM = frozenset({5, 10, 25})
+
+# Only sitters may move a session into these statuses
+_SITTER_ONLY_STATUSES = frozenset({'accepted', 'active', 'completed'})
+
+# Statuses update_session sets with one conditional UPDATE -> statuses they may come from
+_CONDITIONAL_PREV_STATUSES = {
+    target: frozenset(prev for prev, allowed in _VALID_TRANSITIONS.items() if target in allowed)
+    for target in ('active', 'completed', 'cancelled')
+}
+
+
+def _transition_error(current_status: str, new_status: str, user_role: str) -> str:
+    """State-machine and role checks that don't depend on the session row ('' when allowed)"""
     # Terminal states cannot be changed
-    if current_status in ['completed', 'cancelled']:
-        return False, f"Cannot change status from {current_status} (terminal state)"
+    if current_status in _TERMINAL:
+        return f"Cannot change status from {current_status} (terminal state)"
     
     # Check if transition is valid
-    if new_status not in valid_transitions.get(current_status, []):
-        return False, f"Invalid status transition from {current_status} to {new_status}"
+    if new_status not in _VALID_TRANSITIONS.get(current_status, frozenset()):
+        return f"Invalid status transition from {current_status} to {new_status}"
     
     # Role-based validation
     if new_status == 'accepted':
         # Only sitters can accept, and only if they're assigned or it's an open request
         if user_role != 'sitter':
-            return False, "Only sitters can accept session requests"
-        # For 'invite' scope, sitter_id must match
-        if session_data.get('search_scope') == 'invite' and session_data.get('sitter_id') != session_data.get('current_user_id'):
-            return False, "This session was not invited to you"
+            return "Only sitters can accept session requests"
     
     if new_status == 'active':
         # Only sitter can start the session
         if user_role != 'sitter':
-            return False, "Only sitters can start sessions"
+            return "Only sitters can start sessions"
         # Must be accepted first
         if current_status != 'accepted':
-            return False, "Session must be accepted before it can be started"
+            return "Session must be accepted before it can be started"
     
     if new_status == 'completed':
         # Only sitter can complete
         if user_role != 'sitter':
-            return False, "Only sitters can complete sessions"
+            return "Only sitters can complete sessions"
         # Must be active first
         if current_status != 'active':
-            return False, "Session must be active before it can be completed"
+            return "Session must be active before it can be completed"
+    
+    return ""
+
+
+# Row-independent verdict for every (current, new, role), computed once at import
+_TRANSITION_ERRORS = {
+    (current, new, role): _transition_error(current, new, role)
+    for current in _VALID_TRANSITIONS
+    for new in _VALID_TRANSITIONS
+    for role in ('parent', 'sitter', 'admin')
+}
+
+
+def validate_status_transition(current_status: str, new_status: str, user_role: str, session_data: dict) -> tuple[bool, str]:
+    """
+    Validate session status transition (Uber-like state machine)
+    Returns: (is_valid, error_message)
+    """
+    error = _TRANSITION_ERRORS.get((current_status, new_status, user_role))
+    if error is None:
+        # Unknown status or role - evaluate the rules directly
+        error = _transition_error(current_status, new_status, user_role)
+    if error:
+        return False, error
+    
+    # For 'invite' scope, sitter_id must match
+    if new_status == 'accepted' and session_data.get('search_scope') == 'invite' and session_data.get('sitter_id') != session_data.get('current_user_id'):
+        return False, "This session was not invited to you"
     
     return True, ""
 
 
-@router.get("", response_model=List[SessionResponse])
+def _build_insert(session: CreateSessionRequest, scope: str, child_ids: List[str]) -> dict:
+    """Build the sessions row for a new request as a single dict literal"""
+    # Floats for JSON serialization; Postgres converts them to DECIMAL
+    d = {
+        "parent_id": session.parentId,
+        "sitter_id": session.sitterId if scope == 'invite' else None,
+        "child_id": session.childId,  # Primary child (for backward compatibility)
+        "status": "requested",
+        "start_time": session.startTime,
+        "end_time": session.endTime or None,
+        "location": session.location,
+        "hourly_rate": float(session.hourlyRate) if session.hourlyRate else None,
+        "notes": session.notes,
+        "search_scope": scope,
+        "max_distance_km": float(session.maxDistanceKm) if session.maxDistanceKm else None,
+    }
+    # Optional columns may be missing on older databases; create_session retries without them
+    if len(child_ids) > 1:
+        d["child_ids"] = orjson.dumps(child_ids).decode()
+    if session.timeSlots:
+        d["time_slots"] = orjson.dumps([slot.model_dump() for slot in session.timeSlots]).decode()
+    return d
+
+
+def _build_update_data(updates: UpdateSessionRequest, user: CurrentUser, session_data: Optional[dict], now_iso: str) -> dict:
+    """Map an UpdateSessionRequest onto session columns.
+
+    session_data is None on the conditional-update path, where no row was read.
+    """
+    update_data = {}
+    if updates.status is not None:
+        update_data["status"] = updates.status
+        
+        # Handle status-specific updates (Uber-like tracking)
+        if updates.status in ("accepted", "active"):
+            # When sitter accepts/starts, make sure they are assigned to the session
+            if user.role == "sitter" and session_data is not None and not session_data.get("sitter_id"):
+                update_data["sitter_id"] = user.id
+        elif updates.status == "cancelled":
+            # Track who cancelled and when
+            update_data["cancelled_at"] = now_iso
+            update_data["cancelled_by"] = user.role
+            if updates.cancellationReason:
+                update_data["cancellation_reason"] = updates.cancellationReason
+        elif updates.status == "completed":
+            # Track completion time
+            update_data["completed_at"] = now_iso
+            if not updates.endTime:
+                update_data["end_time"] = now_iso
+    
+    if updates.endTime is not None:
+        update_data["end_time"] = updates.endTime
+    if updates.location is not None:
+        update_data["location"] = updates.location
+    if updates.hourlyRate is not None:
+        update_data["hourly_rate"] = float(updates.hourlyRate)  # Convert to float for JSON
+    if updates.totalAmount is not None:
+        update_data["total_amount"] = float(updates.totalAmount)  # Convert to float for JSON
+    if updates.notes is not None:
+        update_data["notes"] = updates.notes
+    
+    return update_data
+
+
+@router.get("", responses={200: {"model": List[SessionResponse]}})
 async def get_user_sessions(
+    request: Request,
     status: Optional[str] = Query(None, description="Filter by status"),
     current_user: CurrentUser = Depends(verify_token),
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    supabase: Client = Depends(get_authed_supabase)
 ):
     """
     Get current user's sessions (parent or sitter)
     """
     try:
-        # Use authenticated Supabase client for RLS to work properly
-        auth_token = credentials.credentials
-        supabase = get_supabase_with_auth(auth_token)
-        
-        if not supabase:
-            raise AppError(
-                code="DB_NOT_AVAILABLE",
-                message="Database connection not available",
-                status_code=503
-            )
-        
         # Build query based on user role
         if current_user.role == "parent":
-            query = supabase.table("sessions").select("*").eq("parent_id", current_user.id)
+            query = supabase.table("sessions").select(_SESSION_COLUMNS).eq("parent_id", current_user.id)
         elif current_user.role == "sitter":
-            query = supabase.table("sessions").select("*").eq("sitter_id", current_user.id)
+            query = supabase.table("sessions").select(_SESSION_COLUMNS).eq("sitter_id", current_user.id)
         else:
             # Admin can see all, or return empty for other roles
-            query = supabase.table("sessions").select("*")
+            query = supabase.table("sessions").select(_SESSION_COLUMNS)
         
         # Apply status filter if provided
         if status:
@@ -225,22 +379,16 @@ async def get_user_sessions(
         # Order by start_time descending
         query = query.order("start_time", desc=True).limit(100)
         
-        print(f"🔍 Querying sessions for user {current_user.id} (role: {current_user.role}, status filter: {status})")
-        response = query.execute()
-        
-        print(f"📥 Raw response data: {response.data if hasattr(response, 'data') else 'NO DATA'}")
-        print(f"📥 Fetched {len(response.data or [])} sessions for user {current_user.id} (role: {current_user.role}, status filter: {status})")
+        response = await run_query(query)
         
-        # Check for errors in response
-        if hasattr(response, 'error') and response.error:
-            print(f"❌ Supabase query error: {response.error}")
+        logger.debug("Fetched %s sessions for user %s (role: %s, status filter: %s)",
+                     len(response.data or []), current_user.id, current_user.role, status)
         
-        sessions = []
-        for session_data in (response.data or []):
-            print(f"📋 Session: {session_data.get('id')} - status: {session_data.get('status')}")
-            sessions.append(db_to_session_response(session_data))
-        
-        return sessions
+        rows = response.data or []
+        etag = rows_etag(rows)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return ORJSONResponse([db_row_to_api_dict(row) for row in rows], headers={"ETag": etag})
         
     except AppError:
         raise
@@ -248,30 +396,29 @@ async def get_user_sessions(
         raise handle_error(e, "Failed to fetch sessions")
 
 
-@router.get("/{session_id}", response_model=SessionResponse)
+@router.get("/{session_id}", responses={200: {"model": SessionResponse}})
 async def get_session_by_id(
+    request: Request,
     session_id: str,
     current_user: CurrentUser = Depends(verify_token),
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    supabase: Client = Depends(get_authed_supabase)
 ):
     """
     Get session by ID
     """
     try:
-        # Use authenticated Supabase client for RLS
-        auth_token = credentials.credentials
-        supabase = get_supabase_with_auth(auth_token)
-        
-        if not supabase:
+        missing_key = (current_user.id, session_id)
+        if missing_key in _missing_sessions:
             raise AppError(
-                code="DB_NOT_AVAILABLE",
-                message="Database connection not available",
-                status_code=503
+                code="SESSION_NOT_FOUND",
+                message="Session not found",
+                status_code=404
             )
         
-        response = supabase.table("sessions").select("*").eq("id", session_id).single().execute()
+        response = await run_query(supabase.table("sessions").select("*").eq("id", session_id).maybe_single())
         
-        if not response.data:
+        if not response or not response.data:
+            _missing_sessions[missing_key] = True
             raise AppError(
                 code="SESSION_NOT_FOUND",
                 message="Session not found",
@@ -288,7 +435,11 @@ async def get_session_by_id(
                 status_code=403
             )
         
-        return db_to_session_response(session_data)
+        # Mobile clients poll session state; unchanged rows answer 304 with no body
+        etag = row_etag(session_data)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return ORJSONResponse(db_row_to_api_dict(session_data), headers={"ETag": etag})
         
     except AppError:
         raise
@@ -296,27 +447,16 @@ async def get_session_by_id(
         raise handle_error(e, "Failed to fetch session")
 
 
-@router.post("", response_model=SessionResponse)
+@router.post("", responses={200: {"model": SessionResponse}})
 async def create_session(
     session_data: CreateSessionRequest,
     current_user: CurrentUser = Depends(verify_token),
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    supabase: Client = Depends(get_authed_supabase)
 ):
     """
     Create a new session request
     """
     try:
-        # CRITICAL: Use Supabase client with user's auth token for RLS to work!
-        auth_token = credentials.credentials
-        supabase = get_supabase_with_auth(auth_token)
-        
-        if not supabase:
-            raise AppError(
-                code="AUTH_ERROR",
-                message="Failed to authenticate with database",
-                status_code=500
-            )
-        
         # Only parents can create sessions
         if current_user.role != "parent":
             raise AppError(
@@ -334,13 +474,12 @@ async def create_session(
             )
         
         # Validate search scope
-        valid_scopes = ['invite', 'nearby', 'city', 'nationwide']
         search_scope = session_data.searchScope or 'invite'  # Default to invite for backward compatibility
         
-        if search_scope not in valid_scopes:
+        if search_scope not in _VALID_SCOPES:
             raise AppError(
                 code="INVALID_SCOPE",
-                message=f"Invalid search scope. Must be one of: {', '.join(valid_scopes)}",
+                message="Invalid search scope. Must be one of: invite, nearby, city, nationwide",
                 status_code=400
             )
         
@@ -359,225 +498,86 @@ async def create_session(
                 status_code=400
             )
         
-        if search_scope == 'nearby' and session_data.maxDistanceKm not in [5, 10, 25]:
+        if search_scope == 'nearby' and session_data.maxDistanceKm not in _NEARBY_DISTANCES_KM:
             raise AppError(
                 code="INVALID_REQUEST",
                 message="maxDistanceKm must be 5, 10, or 25 when searchScope is 'nearby'",
                 status_code=400
             )
         
-        # Insert session
-        # Convert Decimal to float for JSON serialization (Supabase will handle the conversion to DECIMAL in DB)
-        # Handle child_ids: if provided, use it; otherwise, default to array with single child_id
         child_ids_array = session_data.childIds if session_data.childIds else [session_data.childId]
+        insert_data = _build_insert(session_data, search_scope, child_ids_array)
         
-        insert_data = {
-            "parent_id": session_data.parentId,
-            "sitter_id": session_data.sitterId if search_scope == 'invite' else None,
-            "child_id": session_data.childId,  # Primary child (for backward compatibility)
-            "status": "requested",
-            "start_time": session_data.startTime,
-            "end_time": session_data.endTime if session_data.endTime else None,  # Include end_time
-            "location": session_data.location,
-            "hourly_rate": float(session_data.hourlyRate) if session_data.hourlyRate else None,
-            "notes": session_data.notes,
-            "search_scope": search_scope,
-            "max_distance_km": float(session_data.maxDistanceKm) if session_data.maxDistanceKm else None,
-        }
-        
-        # Only include child_ids if the column exists (try-catch will handle if it doesn't)
-        # If child_ids column doesn't exist, we'll fall back to just using child_id
-        if child_ids_array and len(child_ids_array) > 1:
-            # Only add child_ids if we have multiple children (optimization)
-            insert_data["child_ids"] = json.dumps(child_ids_array)
-        
-        # Include time_slots if provided (for Time Slots mode)
-        # Note: This column may not exist in older databases, so we'll handle it gracefully
-        if session_data.timeSlots and len(session_data.timeSlots) > 0:
-            time_slots_data = [
-                {
-                    "date": slot.date,
-                    "startTime": slot.startTime,
-                    "endTime": slot.endTime,
-                    "hours": slot.hours
-                }
-                for slot in session_data.timeSlots
-            ]
-            insert_data["time_slots"] = json.dumps(time_slots_data)
-        
-        print(f"🔄 Attempting to insert session with data: {insert_data}")
-        print(f"📤 Insert data keys: {list(insert_data.keys())}")
-        print(f"📤 Insert data values: {insert_data}")
-        print(f"🔑 Using authenticated Supabase client: {hasattr(supabase, 'postgrest')}")
-        if hasattr(supabase, 'postgrest') and hasattr(supabase.postgrest, 'headers'):
-            auth_header = supabase.postgrest.headers.get('Authorization', 'NOT SET')
-            print(f"🔑 Auth header present: {auth_header[:30] if auth_header != 'NOT SET' else 'NOT SET'}...")
+        logger.debug("Inserting session with data: %s", insert_data)
         
         try:
-            print(f"📤 Executing insert query...")
-            # Supabase Python client: The insert() method returns a query builder
-            # In newer versions, we need to use execute() directly, which returns the inserted data
-            # The .select() method might not be available on SyncQueryRequestBuilder
-            
-            # Try to insert with child_ids and time_slots first, if it fails due to missing column, retry without them
             try:
-                response = supabase.table("sessions").insert(insert_data).execute()
+                response = await run_query(supabase.table("sessions").insert(insert_data, returning="representation"))
             except Exception as column_error:
-                error_str = str(column_error)
-                # Check if error is about missing columns
-                if "child_ids" in error_str.lower() or "time_slots" in error_str.lower() or "PGRST204" in error_str:
-                    print(f"⚠️ Some columns not found in database, retrying without optional columns")
-                    # Remove optional columns from insert_data and retry
-                    insert_data_retry = {k: v for k, v in insert_data.items() 
-                                       if k not in ["child_ids", "time_slots"]}
-                    if "child_ids" in error_str.lower():
-                        print(f"💡 Run scripts/ADD_CHILD_IDS_COLUMN.sql in Supabase SQL Editor to enable multiple children per session")
-                    if "time_slots" in error_str.lower():
-                        print(f"💡 Run scripts/ADD_TIME_SLOTS_COLUMN.sql in Supabase SQL Editor to enable time slots")
-                    response = supabase.table("sessions").insert(insert_data_retry).execute()
-                else:
-                    raise  # Re-raise if it's a different error
-            print(f"📥 Insert response type: {type(response)}")
-            print(f"📥 Response has data attr: {hasattr(response, 'data')}")
-            print(f"📥 Response has error attr: {hasattr(response, 'error')}")
-            print(f"📥 Response data: {response.data if hasattr(response, 'data') else 'NO DATA ATTR'}")
-            print(f"📥 Response data type: {type(response.data) if hasattr(response, 'data') else 'N/A'}")
-            print(f"📥 Response data length: {len(response.data) if hasattr(response, 'data') and response.data else 0}")
-            
-            # Check for errors in response
-            error = None
-            if hasattr(response, 'error'):
-                error = response.error
-            elif hasattr(response, 'errors') and response.errors:
-                error = response.errors[0] if isinstance(response.errors, list) else response.errors
-            elif not hasattr(response, 'data') or not response.data:
-                # Check if response itself indicates an error
-                error = "No data returned from insert"
-            
-            if error:
-                error_str = str(error)
-                print(f"❌ Supabase insert error: {error_str}")
-                print(f"❌ Error type: {type(error)}")
-                print(f"❌ Error repr: {repr(error)}")
-                
-                if "status" in error_str.lower() or "check" in error_str.lower() or "constraint" in error_str.lower() or "sessions_status_check" in error_str:
-                    raise AppError(
-                        code="INVALID_STATUS",
-                        message=f"Invalid status value 'requested'. The database constraint may not allow this status yet. Please run UPDATE_SESSIONS_STATUS.sql in Supabase. Error: {error_str}",
-                        status_code=400
-                    )
-                elif "permission" in error_str.lower() or "policy" in error_str.lower() or "RLS" in error_str or "PGRST" in error_str or "406" in error_str:
-                    raise AppError(
-                        code="PERMISSION_DENIED",
-                        message=f"Database insert blocked by RLS policies. Make sure you're using an authenticated Supabase client. Error: {error_str}",
-                        status_code=403
-                    )
-                else:
-                    raise AppError(
-                        code="CREATE_FAILED",
-                        message=f"Database error: {error_str}",
-                        status_code=500
-                    )
-            
-            # Check if response has data attribute
-            if hasattr(response, 'data'):
-                response_data = response.data
-            elif isinstance(response, list) and len(response) > 0:
-                # Response might be a list directly
-                response_data = response
-            else:
-                response_data = None
-            
-            if not response_data or len(response_data) == 0:
-                print(f"❌ Empty response from insert - no data returned")
-                print(f"❌ This might indicate:")
-                print(f"   1. RLS policy blocking the insert")
-                print(f"   2. Constraint violation (e.g., status 'requested' not allowed)")
-                print(f"   3. Foreign key constraint violation")
-                print(f"   4. Database connection issue")
-                raise AppError(
-                    code="CREATE_FAILED",
-                    message="Failed to create session - no data returned from database. Check RLS policies and database constraints.",
-                    status_code=500
-                )
-            
-            # Extract the first item from response_data (could be list or dict)
-            session_record = response_data[0] if isinstance(response_data, list) else response_data
-            print(f"✅ Session created successfully: {session_record.get('id') if isinstance(session_record, dict) else 'NO ID'}")
-            return db_to_session_response(session_record)
-            
-        except AppError:
-            raise
+                # Older databases may lack child_ids/time_slots; retry without them
+                if not _ERR_MISSING_COLUMN.search(str(column_error)):
+                    raise
+                logger.warning("Some session columns not found in database, retrying without optional columns")
+                insert_data.pop("child_ids", None)
+                insert_data.pop("time_slots", None)
+                response = await run_query(supabase.table("sessions").insert(insert_data, returning="representation"))
         except Exception as insert_error:
-            import traceback
-            error_str = str(insert_error)
-            error_type = type(insert_error).__name__
-            error_traceback = traceback.format_exc()
-            
-            print(f"❌ Exception during session insert: {error_type}: {error_str}")
-            print(f"❌ Exception details: {repr(insert_error)}")
-            print(f"❌ Full traceback:\n{error_traceback}")
-            
-            # Check if it's a Supabase API error
-            if hasattr(insert_error, 'message'):
-                error_str = insert_error.message
-            elif hasattr(insert_error, 'args') and insert_error.args:
-                error_str = str(insert_error.args[0])
-            
-            # Check for specific error types
-            if "status" in error_str.lower() or "check" in error_str.lower() or "constraint" in error_str.lower() or "sessions_status_check" in error_str:
-                raise AppError(
-                    code="INVALID_STATUS",
-                    message=f"Invalid status value 'requested'. The database constraint may not allow this status yet. Please run UPDATE_SESSIONS_STATUS.sql in Supabase. Error: {error_str}",
-                    status_code=400
-                )
-            elif "permission" in error_str.lower() or "policy" in error_str.lower() or "RLS" in error_str or "PGRST" in error_str or "406" in error_str:
-                raise AppError(
-                    code="PERMISSION_DENIED",
-                    message=f"Database insert blocked by RLS policies. Make sure you're using an authenticated Supabase client. Error: {error_str}",
-                    status_code=403
-                )
-            else:
-                raise AppError(
-                    code="CREATE_FAILED",
-                    message=f"Failed to create session: {error_str}",
-                    status_code=500
-                )
+            logger.debug("Exception during session insert: %r", insert_error, exc_info=True)
+            raise _translate_insert_error(insert_error)
+        
+        if not response or not response.data:
+            # Usually an RLS policy, constraint or foreign key rejecting the row
+            raise AppError(
+                code="CREATE_FAILED",
+                message="Failed to create session - no data returned from database. Check RLS policies and database constraints.",
+                status_code=500
+            )
+        
+        session_record = response.data[0]
+        logger.debug("Session created: %s", session_record.get("id"))
+        return ORJSONResponse(db_row_to_api_dict(session_record))
         
     except AppError:
         raise
     except Exception as e:
         error_str = str(e)
-        error_type = type(e).__name__
-        print(f"❌ Unexpected error in create_session: {error_type}: {error_str}")
-        print(f"❌ Full exception: {repr(e)}")
+        logger.debug("Unexpected error in create_session: %r", e, exc_info=True)
         raise handle_error(e, f"Failed to create session: {error_str}")
 
 
-@router.put("/{session_id}", response_model=SessionResponse)
+@router.put("/{session_id}", responses={200: {"model": SessionResponse}})
 async def update_session(
     session_id: str,
     updates: UpdateSessionRequest,
     current_user: CurrentUser = Depends(verify_token),
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    supabase: Client = Depends(get_authed_supabase)
 ):
     """
     Update session (status, notes, etc.) with proper state machine validation
     """
     try:
-        # Use authenticated Supabase client for RLS
-        auth_token = credentials.credentials
-        supabase = get_supabase_with_auth(auth_token)
-        
-        if not supabase:
-            raise AppError(
-                code="DB_NOT_AVAILABLE",
-                message="Database connection not available",
-                status_code=503
+        now_iso = datetime.now(timezone.utc).isoformat()  # One timestamp for every field we stamp
+        
+        # Fast path: one conditional UPDATE (RLS checks access, the status filter the transition)
+        allowed_prev = _CONDITIONAL_PREV_STATUSES.get(updates.status)
+        fast_path = bool(allowed_prev) and (updates.status not in _SITTER_ONLY_STATUSES or current_user.role == "sitter")
+        if fast_path:
+            query = (
+                supabase.table("sessions")
+                .update(_build_update_data(updates, current_user, None, now_iso))
+                .eq("id", session_id)
+                .in_("status", list(allowed_prev))
             )
+            if updates.status == "active":
+                # Unassigned sessions fall through so the sitter gets assigned below
+                query = query.eq("sitter_id", current_user.id)
+            response = await run_query(query.select())
+            if response.data:
+                return ORJSONResponse(db_row_to_api_dict(response.data[0]))
+            # Nothing matched - the read below finds the exact 4xx (or the unassigned-sitter case)
         
         # Get existing session
-        response = supabase.table("sessions").select("*").eq("id", session_id).single().execute()
+        response = await run_query(supabase.table("sessions").select("*").eq("id", session_id).single())
         
         if not response.data:
             raise AppError(
@@ -597,8 +597,8 @@ async def update_session(
                 status_code=403
             )
         
-        # Validate status transition if status is being updated
-        if updates.status is not None and updates.status != current_status:
+        # Validate status transition if status is being updated (after a fast-path miss, even an unchanged one)
+        if updates.status is not None and (updates.status != current_status or fast_path):
             is_valid, error_msg = validate_status_transition(
                 current_status, 
                 updates.status, 
@@ -612,48 +612,12 @@ async def update_session(
                     status_code=400
                 )
         
-        # Build update data
-        update_data = {}
-        if updates.status is not None:
-            update_data["status"] = updates.status
-            
-            # Handle status-specific updates (Uber-like tracking)
-            if updates.status == "accepted":
-                # When sitter accepts, assign them to the session
-                if current_user.role == "sitter" and not session_data.get("sitter_id"):
-                    update_data["sitter_id"] = current_user.id
-            elif updates.status == "cancelled":
-                # Track who cancelled and when
-                update_data["cancelled_at"] = datetime.utcnow().isoformat()
-                update_data["cancelled_by"] = current_user.role
-                if updates.cancellationReason:
-                    update_data["cancellation_reason"] = updates.cancellationReason
-            elif updates.status == "completed":
-                # Track completion time
-                update_data["completed_at"] = datetime.utcnow().isoformat()
-                if not updates.endTime:
-                    update_data["end_time"] = datetime.utcnow().isoformat()
-            elif updates.status == "active":
-                # Ensure sitter is assigned
-                if current_user.role == "sitter" and not session_data.get("sitter_id"):
-                    update_data["sitter_id"] = current_user.id
-        
-        if updates.endTime is not None:
-            update_data["end_time"] = updates.endTime
-        if updates.location is not None:
-            update_data["location"] = updates.location
-        if updates.hourlyRate is not None:
-            update_data["hourly_rate"] = float(updates.hourlyRate)  # Convert to float for JSON
-        if updates.totalAmount is not None:
-            update_data["total_amount"] = float(updates.totalAmount)  # Convert to float for JSON
-        if updates.notes is not None:
-            update_data["notes"] = updates.notes
-        
-        # Add updated_at timestamp
-        update_data["updated_at"] = datetime.utcnow().isoformat()
+        update_data = _build_update_data(updates, current_user, session_data, now_iso)
+        
+        # updated_at is set by the update_sessions_updated_at trigger
         
         # Update session
-        response = supabase.table("sessions").update(update_data).eq("id", session_id).select().execute()
+        response = await run_query(supabase.table("sessions").update(update_data).eq("id", session_id).select())
         
         if not response.data:
             raise AppError(
@@ -662,7 +626,7 @@ async def update_session(
                 status_code=500
             )
         
-        return db_to_session_response(response.data[0])
+        return ORJSONResponse(db_row_to_api_dict(response.data[0]))
         
     except AppError:
         raise
@@ -674,71 +638,57 @@ async def update_session(
 async def cancel_session(
     session_id: str,
     current_user: CurrentUser = Depends(verify_token),
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    supabase: Client = Depends(get_authed_supabase),
     reason: Optional[str] = Query(None, description="Cancellation reason")
 ):
     """
     Cancel a session (Uber-like: soft delete with tracking)
     """
     try:
-        # Use authenticated Supabase client for RLS
-        auth_token = credentials.credentials
-        supabase = get_supabase_with_auth(auth_token)
-        
-        if not supabase:
-            raise AppError(
-                code="DB_NOT_AVAILABLE",
-                message="Database connection not available",
-                status_code=503
-            )
-        
-        # Get existing session
-        response = supabase.table("sessions").select("*").eq("id", session_id).single().execute()
-        
-        if not response.data:
-            raise AppError(
-                code="SESSION_NOT_FOUND",
-                message="Session not found",
-                status_code=404
-            )
-        
-        session_data = response.data
-        current_status = session_data.get("status")
-        
-        # Verify access
-        if not verify_session_access(session_data, current_user):
-            raise AppError(
-                code="FORBIDDEN",
-                message="You don't have access to this session",
-                status_code=403
-            )
-        
-        # Validate cancellation is allowed
-        if current_status in ['completed', 'cancelled']:
-            raise AppError(
-                code="INVALID_STATUS",
-                message=f"Cannot cancel session with status {current_status}",
-                status_code=400
-            )
-        
         # Update status to cancelled with tracking
         update_data = {
             "status": "cancelled",
-            "cancelled_at": datetime.utcnow().isoformat(),
-            "cancelled_by": current_user.role,
-            "updated_at": datetime.utcnow().isoformat()
+            "cancelled_at": datetime.now(timezone.utc).isoformat(),
+            "cancelled_by": current_user.role
         }
         
         if reason:
             update_data["cancellation_reason"] = reason
         
-        response = supabase.table("sessions").update(update_data).eq("id", session_id).execute()
+        # One guarded UPDATE: verify_session_access and the terminal-status check are in the WHERE
+        query = (
+            supabase.table("sessions")
+            .update(update_data)
+            .eq("id", session_id)
+            .not_.in_("status", _TERMINAL)
+        )
+        if current_user.role != "admin":
+            query = query.or_(f"parent_id.eq.{current_user.id},sitter_id.eq.{current_user.id}")
+        response = await run_query(query.select("id"))
         
         if not response.data:
+            # Nothing updated - probe once to report the right error
+            probe = await run_query(supabase.table("sessions").select("id,status").eq("id", session_id).maybe_single())
+            
+            if not probe or not probe.data:
+                raise AppError(
+                    code="SESSION_NOT_FOUND",
+                    message="Session not found",
+                    status_code=404
+                )
+            
+            current_status = probe.data.get("status")
+            if current_status in _TERMINAL:
+                raise AppError(
+                    code="INVALID_STATUS",
+                    message=f"Cannot cancel session with status {current_status}",
+                    status_code=400
+                )
+            
             raise AppError(
-                code="UPDATE_FAILED",
-                message="Failed to cancel session",
-                status_code=500
+                code="FORBIDDEN",
+                message="You don't have access to this session",
+                status_code=403
             )
         
         return {
@@ -752,13 +702,15 @@ async def cancel_session(
         raise handle_error(e, "Failed to cancel session")
 
 
-@router.get("/discover/available", response_model=List[SessionResponse])
+@router.get("/discover/available", responses={200: {"model": List[SessionResponse]}})
 async def discover_available_sessions(
     current_user: CurrentUser = Depends(verify_token),
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    supabase: Client = Depends(get_authed_supabase),
     scope: Optional[str] = Query(None, description="Filter by search scope: invite, nearby, city, nationwide"),
     max_distance: Optional[float] = Query(None, description="Maximum distance in km (for nearby scope)"),
-    sitter_city: Optional[str] = Query(None, description="Sitter's city (for city scope filtering)")
+    sitter_city: Optional[str] = Query(None, description="Sitter's city (for city scope filtering)"),
+    lat: Optional[float] = Query(None, ge=-90, le=90, description="Sitter's latitude (for nearby scope)"),
+    lon: Optional[float] = Query(None, ge=-180, le=180, description="Sitter's longitude (for nearby scope)")
 ):
     """
     Discover available session requests for sitters (Uber-like discovery)
@@ -767,6 +719,7 @@ async def discover_available_sessions(
     Request visibility rules:
     - INVITE mode: Show requests where searchScope = 'invite' AND sitterId = current sitter id (pinned at top)
     - NEARBY mode: Show requests where searchScope = 'nearby', status = 'requested', and within radius
+      of the sitter (lat/lon, else the sitter's saved coordinates)
     - CITY mode: Show requests where searchScope = 'city', status = 'requested', and city matches
     - NATIONWIDE mode: Show requests where searchScope = 'nationwide' and status = 'requested'
     """
@@ -779,112 +732,39 @@ async def discover_available_sessions(
                 status_code=403
             )
         
-        # Use authenticated Supabase client for RLS
-        auth_token = credentials.credentials
-        supabase = get_supabase_with_auth(auth_token)
-        
-        if not supabase:
+        if scope and scope not in _VALID_SCOPES:
             raise AppError(
-                code="DB_NOT_AVAILABLE",
-                message="Database connection not available",
-                status_code=503
+                code="INVALID_SCOPE",
+                message="Scope must be one of: invite, nearby, city, nationwide",
+                status_code=400
             )
         
-        # Get sitter's profile to check city
-        sitter_profile = None
-        if sitter_city or scope == 'city':
-            try:
-                profile_response = supabase.table("users").select("city").eq("id", current_user.id).single().execute()
-                if profile_response.data:
-                    sitter_profile = profile_response.data
-                    sitter_city = sitter_city or profile_response.data.get("city")
-            except:
-                pass  # Continue without city filter if profile fetch fails
-        
-        # Query for available sessions (status = 'requested')
-        # Note: expires_at column may not exist yet - we'll filter expired sessions in Python
-        query = supabase.table("sessions").select("*").eq("status", "requested")
-        
-        # Filter by scope if provided
-        if scope:
-            if scope not in ['invite', 'nearby', 'city', 'nationwide']:
-                raise AppError(
-                    code="INVALID_SCOPE",
-                    message="Scope must be one of: invite, nearby, city, nationwide",
-                    status_code=400
-                )
-            query = query.eq("search_scope", scope)
-        
-        # For nearby scope, filter by max_distance if provided
-        if scope == 'nearby' and max_distance:
-            query = query.lte("max_distance_km", max_distance)
-        
-        # Order by: invite requests first (if sitter is invited), then by start_time
-        # Note: We'll sort in Python to prioritize invite requests
-        query = query.order("start_time", desc=False).limit(200)  # Get more to sort properly
-        
-        response = query.execute()
-        
-        sessions = []
-        invite_sessions = []
-        other_sessions = []
-        
-        # Filter out expired sessions in Python (if expires_at exists in data)
-        from datetime import datetime, timezone
-        now = datetime.now(timezone.utc)
-        
-        for session_data in (response.data or []):
-            # Check if session is expired (if expires_at column exists)
-            expires_at = session_data.get("expires_at")
-            if expires_at:
-                try:
-                    expires_date = datetime.fromisoformat(expires_at.replace('Z', '+00:00'))
-                    if expires_date < now:
-                        continue  # Skip expired sessions
-                except:
-                    pass  # If parsing fails, include the session anyway
-            
-            search_scope = session_data.get("search_scope")
-            sitter_id = session_data.get("sitter_id")
-            
-            # INVITE mode: Only show if this sitter is invited
-            if search_scope == "invite":
-                if sitter_id == current_user.id:
-                    invite_sessions.append(db_to_session_response(session_data))
-                continue  # Skip other invite requests
-            
-            # CITY mode: Filter by city match
-            if search_scope == "city" and sitter_city:
-                location = session_data.get("location")
-                session_city = None
-                if location:
-                    if isinstance(location, str):
-                        try:
-                            import json
-                            location_obj = json.loads(location)
-                            session_city = location_obj.get("city") if isinstance(location_obj, dict) else None
-                        except:
-                            pass
-                    elif isinstance(location, dict):
-                        session_city = location.get("city")
-                
-                # If city doesn't match, skip
-                if session_city and session_city.lower() != sitter_city.lower():
-                    continue
-            
-            # NEARBY and NATIONWIDE: Show all (already filtered by status and scope)
-            other_sessions.append(db_to_session_response(session_data))
-        
-        # Combine: invite sessions first (pinned), then others
-        sessions = invite_sessions + other_sessions
-        
-        # Limit to 100 total
-        sessions = sessions[:100]
-        
-        print(f"🔍 Discovered {len(sessions)} available sessions for sitter {current_user.id} (invites: {len(invite_sessions)})")
-        return sessions
+        # discover_sessions applies status, expiry, invite visibility, scope, city and
+        # PostGIS radius filters (falling back to the sitter's saved city/coordinates) and
+        # orders invites to this sitter first, then by start_time - one round trip
+        response = await run_query(
+            supabase.rpc("discover_sessions", {
+                "p_scope": scope,
+                "p_max_distance": max_distance if scope == 'nearby' and max_distance else None,
+                "p_city": sitter_city,
+                "p_limit": 100,
+                "p_lat": lat,
+                "p_lon": lon,
+            }).select(_SESSION_COLUMNS)
+        )
+        
+        rows = response.data or []
+        logger.debug("Discovered %s available sessions for sitter %s", len(rows), current_user.id)
+        return ORJSONResponse([db_row_to_api_dict(row) for row in rows])
         
     except AppError:
         raise
     except Exception as e:
         raise handle_error(e, "Failed to discover available sessions")
+
+
+# Build the pydantic-core validators at import time rather than on first request
+TimeSlot.model_rebuild()
+SessionResponse.model_rebuild()
+CreateSessionRequest.model_rebuild()
+UpdateSessionRequest.model_rebuild()
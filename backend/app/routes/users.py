@@ -1,18 +1,45 @@
 """
 User and profile management endpoints
 """
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
-from decimal import Decimal
+from datetime import datetime, timezone
+import base64
+import logging
+import orjson
+from cachetools import TTLCache
+from postgrest.exceptions import APIError
+from supabase import Client
 
-from app.utils.auth import verify_token, CurrentUser, security
-from app.utils.error_handler import handle_error, AppError
-from app.utils.database import get_supabase, get_supabase_with_auth
-from fastapi.security import HTTPAuthorizationCredentials
+from app.utils.auth import verify_token, get_authed_supabase, forget_verified_user, CurrentUser
+from app.utils.error_handler import handle_error, is_permission_error, AppError
+from app.utils.database import run_query
+from app.utils.etag import etag_matches, row_etag
+from app.utils.concurrency import InFlight, limit_concurrent_requests
+from app.utils.users import USER_COLUMNS, user_row_to_dict
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# users rows by user id for GET /me (PUT /me refreshes, admin edits evict)
+_profile_rows = TTLCache(maxsize=10_000, ttl=30)
+
+# In-flight profile reads by user id, shared by concurrent cache misses
+_profile_fetches = InFlight()
+
+# Per-user in-flight caps for the sitter list (screens load together) and profile saves
+_sitter_list_slots = limit_concurrent_requests(4)
+_profile_update_slots = limit_concurrent_requests(2)
+
+# Serialized verified-sitter pages for parents and admins; other workers may serve edits up to 60s stale
+_sitter_pages = TTLCache(maxsize=256, ttl=60)
+
+# In-flight verified-sitter queries by page key
+_sitter_fetches = InFlight()
+
 
 class UserProfileResponse(BaseModel):
     """User profile response model"""
@@ -57,127 +84,163 @@ class UpdateProfileRequest(BaseModel):
     longitude: Optional[float] = None  # Current location longitude
 
 
-@router.get("/me", response_model=UserProfileResponse)
+# API field -> users column for PUT /me
+_UPDATE_MAP = {
+    "displayName": "display_name",
+    "phoneNumber": "phone_number",
+    "profileImageUrl": "photo_url",
+    "preferredLanguage": "preferred_language",
+    "theme": "theme",
+    "bio": "bio",
+    "hourlyRate": "hourly_rate",
+    "address": "address",
+    "city": "city",
+    "country": "country",
+    "isActive": "is_active",
+    "latitude": "latitude",
+    "longitude": "longitude",
+}
+
+# Fields an explicit null clears; for the rest, null means "leave unchanged"
+_CLEARABLE_FIELDS = frozenset({
+    "phoneNumber", "address", "city", "country", "isActive", "latitude", "longitude",
+})
+
+
+def _user_row_to_response(user_data: dict, default_role: str = "parent") -> UserProfileResponse:
+    """Convert a users row to UserProfileResponse without re-validating DB data"""
+    return UserProfileResponse.model_construct(**user_row_to_dict(user_data, default_role))
+
+
+def _minimal_profile(current_user: CurrentUser) -> UserProfileResponse:
+    """Profile built from the token alone, for users whose row is missing or unreadable"""
+    now = datetime.now(timezone.utc).isoformat()
+    return UserProfileResponse(
+        id=current_user.id,
+        email=current_user.email,
+        displayName="",
+        role=current_user.role or "parent",
+        preferredLanguage="en",
+        userNumber=None,
+        phoneNumber=None,
+        profileImageUrl=None,
+        theme="auto",
+        isVerified=False,
+        verificationStatus=None,
+        hourlyRate=None,
+        bio=None,
+        address=None,
+        city=None,
+        country=None,
+        createdAt=now,
+        updatedAt=now
+    )
+
+
+def invalidate_cached_user(user_id: str) -> None:
+    """Drop cached profile, role and sitter-list rows after a change made outside PUT /me"""
+    forget_verified_user(user_id)
+    _profile_rows.pop(user_id, None)
+    _profile_fetches.discard(user_id)
+    _sitter_pages.clear()
+    _sitter_fetches.clear()
+
+
+def _sitter_listing_changed(before: Optional[dict], after: dict) -> bool:
+    """Whether a sitter's entry in the verified-sitter list differs (True if before is unknown)"""
+    # updatedAt changes on every save; it alone doesn't justify dropping every cached page
+    if before is None:
+        return True
+    old, new = user_row_to_dict(before, "sitter"), user_row_to_dict(after, "sitter")
+    old.pop("updatedAt")
+    new.pop("updatedAt")
+    return old != new
+
+
+def _encode_sitter_cursor(row: dict) -> str:
+    """Opaque keyset cursor for the verified-sitter page ending at row"""
+    return base64.urlsafe_b64encode(orjson.dumps([row["created_at"], row["id"]])).rstrip(b"=").decode()
+
+
+def _decode_sitter_cursor(cursor: str) -> tuple:
+    """(created_at, id) from a cursor made by _encode_sitter_cursor"""
+    try:
+        created_at, sitter_id = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(created_at), str(sitter_id)
+    except Exception:
+        raise AppError(
+            code="INVALID_CURSOR",
+            message="Invalid pagination cursor",
+            status_code=400
+        )
+
+
+async def _fetch_user_row(supabase: Client, user_id: str) -> Optional[dict]:
+    """users row for user_id, from the profile cache when fresh; None if no row is visible"""
+    row = _profile_rows.get(user_id)
+    if row is not None:
+        return row
+    
+    return await _profile_fetches.run(user_id, lambda: _load_user_row(supabase, user_id))
+
+
+async def _load_sitter_page(query, page_size: Optional[int], cache_key: Optional[tuple]) -> tuple:
+    """
+    Run a verified-sitter query; returns (JSON body, next-page cursor or None)
+    The page is cached under cache_key when given, already serialized for later hits
+    """
+    rows = (await run_query(query)).data or []
+    if not rows:
+        # No matching sitters, or RLS hiding them (see UPDATE_RLS_FOR_VERIFIED_SITTERS.sql)
+        logger.debug("No verified sitters found")
+    # Rows map straight to UserProfileResponse dicts; a full page means more may follow
+    body = orjson.dumps([user_row_to_dict(row, default_role="sitter") for row in rows])
+    next_cursor = _encode_sitter_cursor(rows[-1]) if page_size and len(rows) == page_size else None
+    # Cleared mid-flight by a sitter update: return the page but don't cache it
+    if cache_key is not None and _sitter_fetches.is_current(cache_key):
+        _sitter_pages[cache_key] = (body, next_cursor)
+    return body, next_cursor
+
+
+async def _load_user_row(supabase: Client, user_id: str) -> Optional[dict]:
+    """Query the users row for user_id and cache it"""
+    response = await run_query(supabase.table("users").select(USER_COLUMNS).eq("id", user_id).maybe_single())
+    row = response.data if response else None
+    # PUT /me detaches the in-flight read it overtakes; a detached read must not cache its older row
+    if row and _profile_fetches.is_current(user_id):
+        _profile_rows[user_id] = row
+    return row
+
+
+@router.get("/me", responses={200: {"model": UserProfileResponse}})
 async def get_current_user_profile(
+    request: Request,
     current_user: CurrentUser = Depends(verify_token),
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    supabase: Client = Depends(get_authed_supabase)
 ):
     """
     Get current user's profile
     """
     try:
-        # CRITICAL: Use Supabase client with user's auth token for RLS to work!
-        # Without the token, RLS policies can't identify the user and will block reads
-        auth_token = credentials.credentials
-        supabase = get_supabase_with_auth(auth_token)
-        
-        if not supabase:
-            raise AppError(
-                code="AUTH_ERROR",
-                message="Failed to authenticate with database",
-                status_code=500
-            )
-        
         # Fetch user profile from database
         # Handle RLS blocking gracefully
         try:
-            response = supabase.table("users").select("*").eq("id", current_user.id).single().execute()
-            user_data = response.data
-        except Exception as query_error:
-            # Check if this is a "0 rows" error (RLS blocking or user doesn't exist)
-            error_str = str(query_error)
-            if "0 rows" in error_str or "PGRST116" in error_str or "APIError" in str(type(query_error).__name__):
-                # Try without .single() to see if we get any rows
-                try:
-                    response = supabase.table("users").select("*").eq("id", current_user.id).execute()
-                    if response.data and len(response.data) > 0:
-                        user_data = response.data[0]
-                    else:
-                        # User doesn't exist - return minimal profile
-                        from datetime import datetime
-                        now = datetime.utcnow().isoformat()
-                        print(f"⚠️ User profile not found in DB, returning minimal profile for {current_user.email}")
-                        return UserProfileResponse(
-                            id=current_user.id,
-                            email=current_user.email,
-                            displayName="",
-                            role=current_user.role or "parent",
-                            preferredLanguage="en",
-                            userNumber=None,
-                            phoneNumber=None,
-                            profileImageUrl=None,
-                            theme="auto",
-                            isVerified=False,
-                            verificationStatus=None,
-                            hourlyRate=None,
-                            bio=None,
-                            address=None,
-                            city=None,
-                            country=None,
-                            createdAt=now,
-                            updatedAt=now
-                        )
-                except Exception as retry_error:
-                    # Still blocked - return minimal profile
-                    from datetime import datetime
-                    now = datetime.utcnow().isoformat()
-                    print(f"⚠️ Query blocked by RLS, returning minimal profile for {current_user.email}")
-                    return UserProfileResponse(
-                        id=current_user.id,
-                        email=current_user.email,
-                        displayName="",
-                        role=current_user.role or "parent",
-                        preferredLanguage="en",
-                        userNumber=None,
-                        phoneNumber=None,
-                        profileImageUrl=None,
-                        theme="auto",
-                        isVerified=False,
-                        verificationStatus=None,
-                        hourlyRate=None,
-                        bio=None,
-                        address=None,
-                        city=None,
-                        country=None,
-                        createdAt=now,
-                        updatedAt=now
-                    )
-            else:
-                # Some other error - re-raise it
-                raise query_error
+            user_data = await _fetch_user_row(supabase, current_user.id)
+        except APIError:
+            # Read rejected (RLS/permissions) - return minimal profile
+            logger.warning("Profile query blocked by RLS, returning minimal profile for %s", current_user.email)
+            return _minimal_profile(current_user)
         
         if not user_data:
-            raise AppError(
-                code="PROFILE_NOT_FOUND",
-                message="User profile not found",
-                status_code=404
-            )
+            # User doesn't exist (or RLS hides the row) - return minimal profile
+            logger.warning("User profile not found in DB, returning minimal profile for %s", current_user.email)
+            return _minimal_profile(current_user)
         
-        # Convert database format to API response format
-        return UserProfileResponse(
-            id=user_data["id"],
-            email=user_data["email"],
-            displayName=user_data.get("display_name", ""),
-            role=user_data.get("role", "parent"),
-            preferredLanguage=user_data.get("preferred_language", "en"),
-            userNumber=user_data.get("user_number"),
-            phoneNumber=user_data.get("phone_number"),
-            profileImageUrl=user_data.get("photo_url"),
-            theme=user_data.get("theme", "auto"),
-            isVerified=user_data.get("is_verified", False),
-            verificationStatus=user_data.get("verification_status"),
-            hourlyRate=float(user_data["hourly_rate"]) if user_data.get("hourly_rate") else None,
-            bio=user_data.get("bio"),
-            address=user_data.get("address"),
-            city=user_data.get("city"),
-            country=user_data.get("country"),
-            isActive=user_data.get("is_active"),
-            lastActiveAt=user_data.get("last_active_at"),
-            latitude=float(user_data["latitude"]) if user_data.get("latitude") else None,
-            longitude=float(user_data["longitude"]) if user_data.get("longitude") else None,
-            createdAt=user_data["created_at"],
-            updatedAt=user_data.get("updated_at", user_data["created_at"])
-        )
+        # The app fetches /me on every foreground; an unchanged profile answers 304 with no body
+        etag = row_etag(user_data)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return ORJSONResponse(user_row_to_dict(user_data), headers={"ETag": etag})
         
     except AppError:
         raise
@@ -185,150 +248,64 @@ async def get_current_user_profile(
         raise handle_error(e, "Failed to fetch user profile")
 
 
-@router.put("/me", response_model=UserProfileResponse)
+@router.put("/me", response_model=UserProfileResponse, dependencies=[Depends(_profile_update_slots)])
 async def update_current_user_profile(
     updates: UpdateProfileRequest,
     current_user: CurrentUser = Depends(verify_token),
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    supabase: Client = Depends(get_authed_supabase)
 ):
     """
     Update current user's profile
     """
     try:
-        # CRITICAL: Use Supabase client with user's auth token for RLS to work!
-        # Without the token, RLS policies can't identify the user and will block updates
-        auth_token = credentials.credentials
-        supabase = get_supabase_with_auth(auth_token)
-        
-        if not supabase:
-            raise AppError(
-                code="AUTH_ERROR",
-                message="Failed to authenticate with database",
-                status_code=500
-            )
+        # Fields the client actually sent (explicit nulls included, so they can clear fields)
+        provided = updates.model_fields_set
         
-        # Get all provided fields (including None values to allow clearing fields)
-        try:
-            updates_dict = updates.model_dump(exclude_unset=True) if hasattr(updates, 'model_dump') else updates.dict(exclude_unset=True)
-        except:
-            updates_dict = updates.dict(exclude_unset=True)
+        logger.debug("Received update request with fields: %s", provided)
         
-        print(f"📥 Received update request with fields: {list(updates_dict.keys())}")
-        print(f"📥 Update values: {updates_dict}")
+        # One timestamp for every field stamped by this update
+        now_iso = datetime.now(timezone.utc).isoformat()
         
         # Build update dictionary (only include provided fields)
         update_data = {}
-        if updates.displayName is not None:
-            update_data["display_name"] = updates.displayName
-        # Handle phoneNumber - include if provided (even if None to clear field)
-        if 'phoneNumber' in updates_dict:
-            update_data["phone_number"] = updates.phoneNumber
-            print(f"✅ Including phoneNumber in update: {updates.phoneNumber}")
-        if updates.profileImageUrl is not None:
-            update_data["photo_url"] = updates.profileImageUrl
-        if updates.preferredLanguage is not None:
-            update_data["preferred_language"] = updates.preferredLanguage
-        if updates.theme is not None:
-            update_data["theme"] = updates.theme
-        if updates.bio is not None:
-            update_data["bio"] = updates.bio
-        if updates.hourlyRate is not None:
-            update_data["hourly_rate"] = Decimal(str(updates.hourlyRate))
-        
-        # Handle address, city, country - include if provided (even if None to clear field)
-        # Use 'in' operator to check if field was explicitly provided in the request
-        if 'address' in updates_dict:
-            update_data["address"] = updates.address
-            print(f"✅ Including address in update: {updates.address}")
-        if 'city' in updates_dict:
-            update_data["city"] = updates.city
-            print(f"✅ Including city in update: {updates.city}")
-        if 'country' in updates_dict:
-            update_data["country"] = updates.country
-            print(f"✅ Including country in update: {updates.country}")
+        for key in provided & _UPDATE_MAP.keys():
+            value = getattr(updates, key)
+            if value is not None or key in _CLEARABLE_FIELDS:
+                update_data[_UPDATE_MAP[key]] = value
+        # Update last_active_at when toggling to active
+        if update_data.get("is_active"):
+            update_data["last_active_at"] = now_iso
         
-        # Handle sitter availability and location (for active status)
-        if 'isActive' in updates_dict:
-            update_data["is_active"] = updates.isActive
-            # Update last_active_at when toggling to active
-            if updates.isActive:
-                from datetime import datetime
-                update_data["last_active_at"] = datetime.utcnow().isoformat()
-            print(f"✅ Including isActive in update: {updates.isActive}")
-        
-        if 'latitude' in updates_dict:
-            # Convert to float for JSON serialization (Supabase will handle Decimal conversion)
-            update_data["latitude"] = float(updates.latitude) if updates.latitude is not None else None
-            print(f"✅ Including latitude in update: {updates.latitude}")
-        
-        if 'longitude' in updates_dict:
-            # Convert to float for JSON serialization (Supabase will handle Decimal conversion)
-            update_data["longitude"] = float(updates.longitude) if updates.longitude is not None else None
-            print(f"✅ Including longitude in update: {updates.longitude}")
-        
-        print(f"📤 Final update_data: {update_data}")
+        logger.debug("Final update_data: %s", update_data)
         
         # Add updated_at timestamp
-        from datetime import datetime
-        update_data["updated_at"] = datetime.utcnow().isoformat()
-        
-        # Helper function to build response from updates
-        def build_response_from_updates():
-            now = datetime.utcnow().isoformat()
-            return UserProfileResponse(
-                id=current_user.id,
-                email=current_user.email,
-                displayName=updates.displayName or "",
-                role=current_user.role or "parent",
-                preferredLanguage=updates.preferredLanguage or "en",
-                userNumber=None,
-                phoneNumber=updates.phoneNumber,
-                profileImageUrl=updates.profileImageUrl,
-                theme=updates.theme or "auto",
-                isVerified=False,
-                verificationStatus=None,
-                hourlyRate=updates.hourlyRate,
-                bio=updates.bio,
-                address=updates.address,
-                city=updates.city,
-                country=updates.country,
-                createdAt=now,
-                updatedAt=now
-            )
+        update_data["updated_at"] = now_iso
         
-        # Update user profile - update first, then read back
+        # Update user profile and get the updated row back in the same round trip
         user_data = None
         update_successful = False
         try:
-            print(f"🔄 Attempting to update user {current_user.id} with data: {update_data}")
-            # Update the user (without select - some Supabase client versions don't support select after eq)
-            update_response = supabase.table("users").update(update_data).eq("id", current_user.id).execute()
+            logger.debug("Updating user %s", current_user.id)
+            update_response = await run_query(supabase.table("users").update(
+                update_data, returning="representation"
+            ).eq("id", current_user.id).select(USER_COLUMNS))
             
-            print(f"📥 Update response: {update_response}")
-            
-            # Read the updated user back separately
-            print(f"📖 Reading updated user data...")
-            read_response = supabase.table("users").select("*").eq("id", current_user.id).single().execute()
-            
-            if read_response.data:
-                user_data = read_response.data
+            if update_response.data:
+                user_data = update_response.data[0]
                 update_successful = True
-                print(f"✅ Update successful, got updated row from database")
             else:
-                print(f"❌ Cannot read user after update - update may have failed")
+                # No row returned: RLS filtered the update or the profile doesn't exist
+                logger.warning("Profile update for %s returned no row - update may have been blocked", current_user.id)
                 update_successful = False
                     
         except Exception as update_error:
             # Update query itself failed
             error_str = str(update_error)
-            print(f"❌ Update query failed: {update_error}")
-            print(f"❌ Error type: {type(update_error)}")
-            print(f"❌ Error details: {error_str}")
+            logger.warning("Profile update for %s failed: %r", current_user.id, update_error)
             update_successful = False
             
             # Check if it's an RLS/permission error
-            if "permission" in error_str.lower() or "policy" in error_str.lower() or "PGRST" in error_str:
-                print(f"❌ RLS blocking update - this is a database permission issue")
+            if is_permission_error(error_str):
                 raise AppError(
                     code="PERMISSION_DENIED",
                     message="Database update blocked by security policies. Please check RLS policies.",
@@ -337,7 +314,6 @@ async def update_current_user_profile(
             
             # DO NOT use RPC function as fallback - it will reset role to 'parent'!
             # The RPC function is only for creating new profiles, not updating existing ones
-            print(f"❌ Cannot use RPC fallback - it would reset user role. Update must use direct table update.")
             raise AppError(
                 code="UPDATE_FAILED",
                 message=f"Failed to update user profile in database: {error_str}",
@@ -346,34 +322,15 @@ async def update_current_user_profile(
         
         # Only return success if we actually got updated data from database
         if update_successful and user_data:
-            print(f"✅ Returning updated user data from database")
-            return UserProfileResponse(
-                id=user_data["id"],
-                email=user_data["email"],
-                displayName=user_data.get("display_name", ""),
-                role=user_data.get("role", "parent"),
-                preferredLanguage=user_data.get("preferred_language", "en"),
-                userNumber=user_data.get("user_number"),
-                phoneNumber=user_data.get("phone_number"),
-                profileImageUrl=user_data.get("photo_url"),
-                theme=user_data.get("theme", "auto"),
-                isVerified=user_data.get("is_verified", False),
-                verificationStatus=user_data.get("verification_status"),
-                hourlyRate=float(user_data["hourly_rate"]) if user_data.get("hourly_rate") else None,
-                bio=user_data.get("bio"),
-                address=user_data.get("address"),
-                city=user_data.get("city"),
-                country=user_data.get("country"),
-                isActive=user_data.get("is_active"),
-                lastActiveAt=user_data.get("last_active_at"),
-                latitude=float(user_data["latitude"]) if user_data.get("latitude") else None,
-                longitude=float(user_data["longitude"]) if user_data.get("longitude") else None,
-                createdAt=user_data["created_at"],
-                updatedAt=user_data.get("updated_at", user_data["created_at"])
-            )
+            previous = _profile_rows.get(current_user.id)
+            _profile_rows[current_user.id] = user_data
+            _profile_fetches.discard(current_user.id)
+            if current_user.role == "sitter" and _sitter_listing_changed(previous, user_data):
+                _sitter_pages.clear()
+                _sitter_fetches.clear()
+            return _user_row_to_response(user_data)
         else:
             # Update failed - raise error instead of returning fake data
-            print(f"❌ Database update failed - cannot return fake success")
             raise AppError(
                 code="UPDATE_FAILED",
                 message="Failed to update user profile in database. The update may have been blocked by security policies.",
@@ -386,11 +343,16 @@ async def update_current_user_profile(
         raise handle_error(e, "Failed to update user profile")
 
 
-@router.get("/sitters/verified", response_model=List[UserProfileResponse])
+@router.get(
+    "/sitters/verified",
+    responses={200: {"model": List[UserProfileResponse]}},
+    dependencies=[Depends(_sitter_list_slots)]
+)
 async def get_verified_sitters(
     current_user: CurrentUser = Depends(verify_token),
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    limit: int = 100,
+    supabase: Client = Depends(get_authed_supabase),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of sitters to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     request_mode: Optional[str] = Query(None, description="Filter by request mode: invite, nearby, city, nationwide"),
     parent_latitude: Optional[float] = Query(None, description="Parent's latitude (for nearby search)"),
     parent_longitude: Optional[float] = Query(None, description="Parent's longitude (for nearby search)"),
@@ -408,87 +370,76 @@ async def get_verified_sitters(
     - city: Returns active sitters in the same city as parent
     - nationwide: Returns all active sitters
     - Default (no mode): Returns all active sitters (for backward compatibility)
+    
+    Results are newest first; when more may follow, the X-Next-Cursor header holds
+    the cursor for the next page
     """
     try:
-        # Use authenticated Supabase client for RLS
-        auth_token = credentials.credentials
-        supabase = get_supabase_with_auth(auth_token)
+        after_created_at, after_id = _decode_sitter_cursor(cursor) if cursor else (None, None)
         
-        if not supabase:
-            raise AppError(
-                code="AUTH_ERROR",
-                message="Failed to authenticate with database",
-                status_code=500
-            )
-        
-        # Base query: verified sitters only
-        query = supabase.table("users").select("*").eq("role", "sitter").eq("is_verified", True)
+        nearby = request_mode == "nearby"
+        if nearby:
+            if not parent_latitude or not parent_longitude:
+                logger.debug("Nearby mode requires parent location, returning empty list")
+                return []
+            if not max_distance_km:
+                max_distance_km = 10.0  # Default 10km radius
+            logger.debug("Nearby search: parent at (%s, %s), radius: %skm", parent_latitude, parent_longitude, max_distance_km)
+        elif request_mode == "city" and not parent_city:
+            logger.debug("City mode requires parent_city, returning empty list")
+            return []
         
-        # Filter by request mode
-        if request_mode == "invite":
-            # Invite mode: show all verified sitters for browsing (regardless of active status)
-            # If specific sitter_id provided, filter to that sitter only
-            if sitter_id:
-                query = query.eq("id", sitter_id)
-            # Otherwise, show all verified sitters so parent can browse and select
-            # Note: Active status not required for invite mode - parent can invite any verified sitter
+        # Inviting a specific sitter is a primary-key lookup: no ordering, paging or scan.
+        # Invite mode includes inactive sitters - a parent can invite any verified sitter
+        point_lookup = request_mode == "invite" and sitter_id is not None
+        if point_lookup:
+            if cursor:
+                return []
+            query = (
+                supabase.table("users").select(USER_COLUMNS)
+                .eq("id", sitter_id).eq("role", "sitter").eq("is_verified", True).limit(1)
+            )
         else:
-            # For all other modes (nearby, city, nationwide), only show active sitters
-            query = query.eq("is_active", True)
-            
-            if request_mode == "nearby":
-                # Nearby mode: filter by distance (will be done in Python after fetching)
-                if not parent_latitude or not parent_longitude:
-                    print(f"⚠️ Nearby mode requires parent location, returning empty list")
-                    return []
-                if not max_distance_km:
-                    max_distance_km = 10.0  # Default 10km radius
-                print(f"📍 Nearby search: parent at ({parent_latitude}, {parent_longitude}), radius: {max_distance_km}km")
-            elif request_mode == "city":
-                # City mode: filter by city match
-                if parent_city:
-                    query = query.eq("city", parent_city)
-                    print(f"📍 City search: filtering by city '{parent_city}'")
-                else:
-                    print(f"⚠️ City mode requires parent_city, returning empty list")
-                    return []
-            # nationwide mode: no additional filters, just active sitters
-            print(f"🔍 Filtering for active sitters (is_active = True)")
+            # get_verified_sitters applies the verified/active, city and PostGIS radius
+            # filters and the read policy's visibility in one SECURITY DEFINER scan, newest first
+            query = supabase.rpc("get_verified_sitters", {
+                "p_mode": request_mode,
+                "p_sitter_id": None,
+                "p_city": parent_city if request_mode == "city" else None,
+                "p_limit": limit,
+                "p_after_created_at": after_created_at,
+                "p_after_id": after_id,
+                "p_lat": parent_latitude if nearby else None,
+                "p_lon": parent_longitude if nearby else None,
+                "p_max_distance_km": max_distance_km if nearby else None,
+            }).select(USER_COLUMNS)
         
-        # Order by created_at (newest first) or you could order by rating/reviews if available
-        query = query.order("created_at", desc=True).limit(limit * 2)  # Fetch more for distance filtering
-        
-        print(f"🔍 Querying verified sitters for user {current_user.id} (role: {current_user.role}, mode: {request_mode})")
-        print(f"📋 Query filters: role=sitter, is_verified=True" + (f", is_active=True" if request_mode != "invite" else ""))
+        # Sitters only ever see their own row, so only parent/admin results are shared
+        shareable = current_user.role in ("parent", "admin")
+        cache_key = (
+            request_mode if request_mode in ("invite", "nearby", "city") else None,
+            sitter_id if request_mode == "invite" else None,
+            parent_city if request_mode == "city" else None,
+            (parent_latitude, parent_longitude, max_distance_km) if nearby else None,
+            limit,
+            cursor,
+        )
+        page = _sitter_pages.get(cache_key) if shareable else None
         
         try:
-            response = query.execute()
-            
-            # Check for errors in response
-            if hasattr(response, 'error') and response.error:
-                error_str = str(response.error)
-                print(f"❌ Supabase query error: {error_str}")
-                if "permission" in error_str.lower() or "policy" in error_str.lower() or "RLS" in error_str or "PGRST" in error_str:
-                    raise AppError(
-                        code="PERMISSION_DENIED",
-                        message="Cannot access verified sitters. RLS policy may be blocking access. Please run UPDATE_RLS_FOR_VERIFIED_SITTERS.sql in Supabase SQL Editor.",
-                        status_code=403
-                    )
-            
-            print(f"📥 Found {len(response.data or [])} verified sitters (before distance/location filtering)")
-            
-            if not response.data:
-                print(f"⚠️ No verified sitters found. Possible reasons:")
-                print(f"   1. No sitters with is_verified = true and is_active = true")
-                print(f"   2. RLS policies blocking access (run UPDATE_RLS_FOR_VERIFIED_SITTERS.sql)")
-                print(f"   3. Database connection issue")
-                return []
+            if page is None:
+                logger.debug("Querying verified sitters for user %s (mode: %s)", current_user.id, request_mode)
+                page_size = None if point_lookup else limit
+                if shareable:
+                    page = await _sitter_fetches.run(cache_key, lambda: _load_sitter_page(query, page_size, cache_key))
+                else:
+                    page = await _load_sitter_page(query, page_size, None)
         except AppError:
             raise
         except Exception as query_error:
             error_str = str(query_error)
-            print(f"❌ Query execution error: {error_str}")
-            if "permission" in error_str.lower() or "policy" in error_str.lower() or "RLS" in error_str or "PGRST" in error_str or "406" in error_str:
+            logger.warning("Verified sitters query failed: %s", error_str)
+            if is_permission_error(error_str):
                 raise AppError(
                     code="PERMISSION_DENIED",
                     message="Cannot access verified sitters. RLS policy may be blocking access. Please run UPDATE_RLS_FOR_VERIFIED_SITTERS.sql in Supabase SQL Editor to allow parents to read verified sitter profiles.",
@@ -496,72 +447,9 @@ async def get_verified_sitters(
                 )
             raise
         
-        # Convert to response format and apply distance filtering for nearby mode
-        sitters = []
-        for user_data in (response.data or []):
-            # For nearby mode, calculate distance and filter
-            if request_mode == "nearby" and parent_latitude and parent_longitude:
-                sitter_lat = user_data.get("latitude")
-                sitter_lng = user_data.get("longitude")
-                
-                if sitter_lat is None or sitter_lng is None:
-                    # Skip sitters without location data
-                    continue
-                
-                # Calculate distance using Haversine formula
-                from math import radians, cos, sin, asin, sqrt
-                
-                def haversine_distance(lat1, lon1, lat2, lon2):
-                    """Calculate distance between two points on Earth in km"""
-                    R = 6371  # Earth radius in km
-                    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-                    dlat = lat2 - lat1
-                    dlon = lon2 - lon1
-                    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-                    c = 2 * asin(sqrt(a))
-                    return R * c
-                
-                distance = haversine_distance(
-                    float(parent_latitude),
-                    float(parent_longitude),
-                    float(sitter_lat),
-                    float(sitter_lng)
-                )
-                
-                if distance > max_distance_km:
-                    # Skip sitters outside the radius
-                    continue
-            
-            sitters.append(UserProfileResponse(
-                id=user_data["id"],
-                email=user_data["email"],
-                displayName=user_data.get("display_name", ""),
-                role=user_data.get("role", "sitter"),
-                preferredLanguage=user_data.get("preferred_language", "en"),
-                userNumber=user_data.get("user_number"),
-                phoneNumber=user_data.get("phone_number"),
-                profileImageUrl=user_data.get("photo_url"),
-                theme=user_data.get("theme", "auto"),
-                isVerified=user_data.get("is_verified", False),
-                verificationStatus=user_data.get("verification_status"),
-                hourlyRate=float(user_data["hourly_rate"]) if user_data.get("hourly_rate") else None,
-                bio=user_data.get("bio"),
-                address=user_data.get("address"),
-                city=user_data.get("city"),
-                country=user_data.get("country"),
-                isActive=user_data.get("is_active"),
-                lastActiveAt=user_data.get("last_active_at"),
-                latitude=float(user_data["latitude"]) if user_data.get("latitude") else None,
-                longitude=float(user_data["longitude"]) if user_data.get("longitude") else None,
-                createdAt=user_data["created_at"],
-                updatedAt=user_data.get("updated_at", user_data["created_at"])
-            ))
-        
-        # Limit results after filtering
-        sitters = sitters[:limit]
-        
-        print(f"✅ Found {len(sitters)} verified sitters (after filtering)")
-        return sitters
+        body, next_cursor = page
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+        return Response(content=body, media_type="application/json", headers=headers)
         
     except AppError:
         raise
@@ -2,7 +2,6 @@
 Audio processing utilities
 Placeholder for MFCC extraction
 """
-import numpy as np
 from typing import List
 
 def extract_mfcc(audio_data: bytes, sample_rate: int = 16000) -> List[List[float]]:
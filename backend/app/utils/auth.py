@@ -4,10 +4,15 @@ Authentication middleware and utilities for Supabase JWT validation
 from fastapi import HTTPException, Depends, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
+import asyncio
+import hashlib
+import logging
 import os
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from cachetools import TLRUCache, TTLCache
 import jwt
 from jwt import PyJWKClient
 import httpx
@@ -22,17 +27,51 @@ SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY", "")
 SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET", "")
 
 # Import database utility
-from app.utils.database import get_supabase
+from app.utils.database import get_supabase, get_cached_supabase_with_auth
+from app.utils.error_handler import AppError, handle_error
+from app.utils.concurrency import InFlight
+
+logger = logging.getLogger(__name__)
 
 security = HTTPBearer()
 
 
+def get_authed_supabase(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Client:
+    """
+    Dependency: Supabase client authenticated with the caller's JWT (for RLS)
+    Clients are cached per token until it expires
+    """
+    client = get_cached_supabase_with_auth(credentials.credentials)
+    if not client:
+        raise handle_error(AppError(
+            code="DB_NOT_AVAILABLE",
+            message="Database connection not available",
+            status_code=503
+        ))
+    return client
+
+
 class CurrentUser:
     """Represents the current authenticated user"""
-    def __init__(self, user_id: str, email: str, role: Optional[str] = None):
+    def __init__(self, user_id: str, email: str, role: Optional[str] = None, expires_at: Optional[float] = None):
         self.id = user_id
         self.email = email
         self.role = role
+        self.expires_at = expires_at  # JWT exp (unix time), bounds how long the user may be cached
+
+
+# Verified users by JWT hash, for at most 60s (admin edits evict them on this worker)
+_VERIFIED_USER_TTL = 60
+_verified_users = TLRUCache(
+    maxsize=2048,
+    ttu=lambda _key, user, now: min(user.expires_at - 60, now + _VERIFIED_USER_TTL),
+    timer=time.time
+)
+# _verified_users keys by user id, so an admin role change or delete can evict them
+_verified_keys = TTLCache(maxsize=2048, ttl=_VERIFIED_USER_TTL, timer=time.time)
+
+# Verifications in flight by token hash, shared by a client's simultaneous requests
+_verifications = InFlight()
 
 
 async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> CurrentUser:
@@ -54,6 +93,92 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
             }
         )
     
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    user = _verified_users.get(key)
+    if user is not None:
+        return user
+    
+    return await _verifications.run(key, lambda: _verify_and_cache(token, key))
+
+
+async def _verify_and_cache(token: str, key: bytes) -> CurrentUser:
+    """Verify a token and remember the result until the cache entry expires"""
+    user = await _verify_token_uncached(token)
+    # Not if forget_verified_user ran meanwhile: the role read may predate the change
+    if user.expires_at and _verifications.is_current(key):
+        _verified_users[key] = user
+        # Keep only this user's keys that are still cached, plus the new one
+        keys = {k for k in _verified_keys.get(user.id, ()) if k in _verified_users}
+        keys.add(key)
+        _verified_keys[user.id] = keys
+    return user
+
+
+def forget_verified_user(user_id: str) -> None:
+    """Drop a user's cached token verifications (role changed or user deleted)"""
+    # In-flight ones are keyed by token, not user; detach them all so none gets cached
+    _verifications.clear()
+    for key in _verified_keys.pop(user_id, ()):
+        _verified_users.pop(key, None)
+
+
+def _get_auth_user(supabase: Client, token: str):
+    """
+    Look the token up in auth.users (the primary security check)
+    Returns None if Supabase auth couldn't be reached, so the decoded token is used
+    """
+    try:
+        auth_user = supabase.auth.get_user(token).user
+    except Exception as auth_error:
+        # If Supabase auth verification fails, we still proceed with decoded token
+        # but log the warning
+        logger.warning("Supabase auth verification failed, using decoded token: %s", auth_error)
+        return None
+    if not auth_user:
+        raise HTTPException(
+            status_code=401,
+            detail={
+                "success": False,
+                "error": {
+                    "code": "UNAUTHORIZED",
+                    "message": "User not found in authentication system"
+                }
+            }
+        )
+    return auth_user
+
+
+def _metadata_role(claims: dict) -> Optional[str]:
+    """Role the user signed up with, from the JWT metadata ('babysitter' -> 'sitter')"""
+    user_metadata = claims.get("user_metadata") or {}
+    app_metadata = claims.get("app_metadata") or {}
+    role = user_metadata.get("role") or app_metadata.get("role")
+    return "sitter" if role == "babysitter" else role
+
+
+def _get_or_create_role(supabase: Client, token: str, user_id: str, email: str, jwt_role: Optional[str]) -> Optional[str]:
+    """
+    Read the user's role from public.users, creating their profile first if missing
+    One round trip: get_or_create_user_profile is SECURITY DEFINER, so RLS can't hide the row
+    """
+    # The caller's own client, so auth.uid() inside the function matches p_id
+    client = get_cached_supabase_with_auth(token) or supabase
+    try:
+        response = client.rpc("get_or_create_user_profile", {
+            "p_id": user_id,
+            "p_email": email,
+            "p_role": jwt_role,  # only used if the profile has to be created
+        }).execute()
+    except Exception as query_error:
+        logger.warning("Role lookup / auto-create failed (non-fatal): %s", query_error)
+        return None
+    
+    logger.debug("User %s has role: %s", user_id, response.data)
+    return response.data
+
+
+async def _verify_token_uncached(token: str) -> CurrentUser:
+    """Full verification path behind verify_token's cache"""
     try:
         supabase = get_supabase()
         if not supabase:
@@ -84,13 +209,12 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
             email = decoded_unverified.get("email", "")
             
             # Check expiration manually
-            import time
             exp = decoded_unverified.get("exp")
             if exp and exp < time.time():
                 token_expired = True
-                print(f"⚠️ Token expired for user {user_id}")
+                logger.debug("Token expired for user %s", user_id)
         except Exception as decode_error:
-            print(f"❌ Failed to decode token: {decode_error}")
+            logger.debug("Failed to decode token: %s", decode_error)
             raise HTTPException(
                 status_code=401,
                 detail={
@@ -126,142 +250,44 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
                 }
             )
         
-        # Step 2: Verify user exists in auth.users (via Supabase client)
-        # This is the primary security check
-        try:
-            auth_user = supabase.auth.get_user(token)
-            if not auth_user.user:
-                raise HTTPException(
-                    status_code=401,
-                    detail={
-                        "success": False,
-                        "error": {
-                            "code": "UNAUTHORIZED",
-                            "message": "User not found in authentication system"
-                        }
-                    }
-                )
-            # Use the verified user data
-            user_id = auth_user.user.id
-            email = auth_user.user.email or email or ""
-        except HTTPException:
-            raise
-        except Exception as auth_error:
-            # If Supabase auth verification fails, we still proceed with decoded token
-            # but log the warning
-            print(f"⚠️ Supabase auth verification failed, using decoded token: {auth_error}")
-        
-        # Step 3: Check if user exists in public.users table
-        # Use authenticated Supabase client to bypass RLS
-        role = None
-        user_exists = False
-        
-        try:
-            # Try with authenticated client first (bypasses RLS)
-            from app.utils.database import get_supabase_with_auth
-            auth_supabase = get_supabase_with_auth(token)
-            if auth_supabase:
-                try:
-                    response = auth_supabase.table("users").select("role").eq("id", user_id).single().execute()
-                    if response.data:
-                        role = response.data.get("role")
-                        user_exists = True
-                        print(f"✅ User {user_id} found in database with role: {role}")
-                except Exception as auth_query_error:
-                    # If authenticated client also fails, try unauthenticated
-                    print(f"⚠️ Authenticated query failed, trying unauthenticated: {auth_query_error}")
-                    response = supabase.table("users").select("role").eq("id", user_id).single().execute()
-                    if response.data:
-                        role = response.data.get("role")
-                        user_exists = True
-                        print(f"✅ User {user_id} found in database with role: {role}")
-            else:
-                # Fallback to unauthenticated client
-                response = supabase.table("users").select("role").eq("id", user_id).single().execute()
-                if response.data:
-                    role = response.data.get("role")
-                    user_exists = True
-                    print(f"✅ User {user_id} found in database with role: {role}")
-        except Exception as query_error:
-            error_str = str(query_error)
-            # RLS blocking or user not found - both are OK, we'll auto-create
-            if "0 rows" in error_str or "PGRST116" in error_str or "permission" in error_str.lower() or "406" in error_str:
-                print(f"⚠️ User {user_id} not found in public.users or RLS blocked, will auto-create")
-                user_exists = False
-            else:
-                print(f"⚠️ Database query error (non-fatal): {query_error}")
-                user_exists = False
+        # Role to give the profile if it has to be auto-created
+        jwt_role = _metadata_role(decoded_unverified)
         
-        # Step 4: Auto-create user profile if missing
-        if not user_exists:
-            try:
-                print(f"🔄 Auto-creating user profile for {user_id} ({email})")
-                
-                # Try to get role from JWT token metadata
-                user_role = None
-                try:
-                    decoded = jwt.decode(token, options={"verify_signature": False})
-                    user_metadata = decoded.get("user_metadata", {})
-                    app_metadata = decoded.get("app_metadata", {})
-                    user_role = user_metadata.get("role") or app_metadata.get("role")
-                    if user_role:
-                        # Normalize: 'babysitter' -> 'sitter'
-                        if user_role == "babysitter":
-                            user_role = "sitter"
-                        print(f"✅ Role found in JWT metadata: {user_role}")
-                except Exception as metadata_error:
-                    print(f"⚠️ Could not extract role from JWT metadata: {metadata_error}")
-                
-                # Only pass parameters that exist in the create_user_profile function
-                # Note: address, city, country are not in the function signature - they must be updated separately
-                rpc_data = {
-                    "p_id": user_id,
-                    "p_email": email,
-                    "p_display_name": None,  # Will be set by frontend later
-                    "p_role": user_role,  # Pass role from JWT metadata if available
-                    "p_phone_number": None,
-                    # p_address, p_city, p_country are NOT in the function signature - removed
-                }
-                supabase.rpc("create_user_profile", rpc_data).execute()
-                print(f"✅ User profile created successfully for {user_id} with role: {user_role or 'parent (default)'}")
-                
-                # Try to read the role after creation using authenticated client
-                try:
-                    from app.utils.database import get_supabase_with_auth
-                    auth_supabase = get_supabase_with_auth(token)
-                    if auth_supabase:
-                        response = auth_supabase.table("users").select("role").eq("id", user_id).single().execute()
-                        if response.data:
-                            role = response.data.get("role")
-                            print(f"✅ Role read after creation: {role}")
-                        else:
-                            # Try unauthenticated as fallback
-                            response = supabase.table("users").select("role").eq("id", user_id).single().execute()
-                            if response.data:
-                                role = response.data.get("role")
-                    else:
-                        # Fallback to unauthenticated
-                        response = supabase.table("users").select("role").eq("id", user_id).single().execute()
-                        if response.data:
-                            role = response.data.get("role")
-                except Exception as read_error:
-                    # If RLS still blocks, use the role we passed to create_user_profile
-                    if user_role:
-                        role = user_role
-                        print(f"✅ Using role from JWT metadata (RLS blocked read): {role}")
-                    else:
-                        role = "parent"  # Default role
-                        print(f"⚠️ RLS blocked read after creation, using default role: {role}")
-            except Exception as create_error:
-                print(f"⚠️ Auto-create failed (non-fatal): {create_error}")
-                # Continue anyway with default role
-                role = role or "parent"
+        if SUPABASE_JWT_SECRET:
+            # Step 2: Verify the signature locally (HMAC, no network round trip)
+            # ExpiredSignatureError / InvalidTokenError map to the 401s below
+            decoded = jwt.decode(
+                token,
+                SUPABASE_JWT_SECRET,
+                algorithms=["HS256"],
+                audience="authenticated",
+                options={"require": ["exp", "sub"]}
+            )
+            user_id = decoded["sub"]
+            email = decoded.get("email") or ""
+
+            # Step 3: Get the role from public.users, auto-creating the profile if missing
+            role = await asyncio.to_thread(_get_or_create_role, supabase, token, user_id, email, jwt_role)
+        else:
+            # Step 2: Verify user exists in auth.users (via Supabase client)
+            # Step 3: Get the role from public.users, auto-creating the profile if missing
+            # The two calls are independent round trips, so run them concurrently; PostgREST
+            # checks the JWT itself before the profile function runs
+            auth_user, role = await asyncio.gather(
+                asyncio.to_thread(_get_auth_user, supabase, token),
+                asyncio.to_thread(_get_or_create_role, supabase, token, user_id, email, jwt_role),
+            )
+            if auth_user:
+                # Use the verified user data
+                user_id = auth_user.id
+                email = auth_user.email or email or ""
         
-        # Step 5: Return CurrentUser (always succeeds if we got here)
+        # Step 4: Return CurrentUser (always succeeds if we got here)
         return CurrentUser(
             user_id=user_id,
             email=email,
-            role=role or "parent"  # Default to "parent" if role is None
+            role=role or "parent",  # Default to "parent" if role is None
+            expires_at=exp
         )
         
     except HTTPException:
@@ -289,9 +315,7 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
             }
         )
     except Exception as e:
-        print(f"❌ Unexpected auth error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Unexpected auth error: %s", e)
         raise HTTPException(
             status_code=401,
             detail={
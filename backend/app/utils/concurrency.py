@@ -0,0 +1,79 @@
+"""
+Per-user concurrency limits for expensive endpoints, and shared in-flight loads
+"""
+import asyncio
+from collections import Counter
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+from fastapi import Depends, HTTPException
+
+T = TypeVar("T")
+
+
+def limit_concurrent_requests(max_in_flight: int):
+    """
+    Dependency factory: allow each user at most max_in_flight requests at once on the
+    routes using it, and answer 429 immediately beyond that
+    Counts are per worker process, which is enough to stop one client from tying up
+    the Supabase connection pool
+    """
+    # Imported here: app.utils.auth uses InFlight from this module
+    from app.utils.auth import verify_token, CurrentUser
+
+    in_flight = Counter()
+
+    async def dependency(current_user: CurrentUser = Depends(verify_token)):
+        if in_flight[current_user.id] >= max_in_flight:
+            raise HTTPException(
+                status_code=429,
+                detail={
+                    "success": False,
+                    "error": {
+                        "code": "TOO_MANY_REQUESTS",
+                        "message": "Too many concurrent requests, please retry shortly"
+                    }
+                }
+            )
+        in_flight[current_user.id] += 1
+        try:
+            yield
+        finally:
+            in_flight[current_user.id] -= 1
+            if not in_flight[current_user.id]:
+                del in_flight[current_user.id]
+
+    return dependency
+
+
+class InFlight:
+    """
+    Loads running right now, by key: concurrent callers for the same key await one load
+    instead of each starting their own. Finished loads (failed ones included) are
+    forgotten, so the next caller starts a fresh one
+    """
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    def run(self, key: Hashable, load: Callable[[], Awaitable[T]]) -> Awaitable[T]:
+        """Await the in-flight load for key, starting load() if there is none"""
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.create_task(load())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._tasks.get(key) is done and self._tasks.pop(key))
+        # shield: one caller disconnecting must not cancel the load the others are waiting on
+        return asyncio.shield(task)
+
+    def is_current(self, key: Hashable) -> bool:
+        """Inside a load: False once discard() or clear() detached it, so its result is stale"""
+        return self._tasks.get(key) is asyncio.current_task()
+
+    def discard(self, key: Hashable) -> None:
+        """Detach the load for key; it keeps running for its waiters, later callers start anew"""
+        self._tasks.pop(key, None)
+
+    def clear(self) -> None:
+        """Detach every load"""
+        self._tasks.clear()
+
+    def __len__(self) -> int:
+        return len(self._tasks)
@@ -1,19 +1,71 @@
 """
 Database connection utilities
 """
+import asyncio
+import hashlib
+import logging
 import os
+import threading
+import time
 from pathlib import Path
 from typing import Optional
+import httpx
+import jwt
+from cachetools import TLRUCache
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 
 # Load environment variables from .env file
 env_path = Path(__file__).parent.parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
+logger = logging.getLogger(__name__)
+
 # Global Supabase client (without auth token - for admin operations)
 _supabase: Optional[Client] = None
 
+# Shared HTTP connection pool used by every Supabase client in this process
+_http_client: Optional[httpx.Client] = None
+
+# Authenticated clients keyed by a hash of the JWT; each entry lives until the token's exp
+_authed_clients = TLRUCache(maxsize=512, ttu=lambda _key, value, _now: value[1], timer=time.time)
+_authed_clients_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Get the shared HTTP/2 keep-alive client used for all Supabase calls
+    Reusing one pool avoids a TCP+TLS handshake per request and lets
+    PostgREST multiplex concurrent queries over the same connection
+    """
+    global _http_client
+
+    if _http_client is None:
+        # retries=1 re-dials once when connecting fails (e.g. a pooled connection the
+        # server already dropped); it never replays a request that reached PostgREST
+        transport = httpx.HTTPTransport(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=100, keepalive_expiry=60.0),
+            retries=1,
+        )
+        _http_client = httpx.Client(transport=transport, timeout=5.0)
+
+    return _http_client
+
+
+def close_http_client() -> None:
+    """Close the shared pool (called on app shutdown)"""
+    global _http_client
+    
+    if _http_client is not None:
+        _http_client.close()
+        _http_client = None
+
+
+def _client_options() -> ClientOptions:
+    """Client options that route Supabase traffic through the shared pool"""
+    return ClientOptions(httpx_client=get_http_client())
+
 
 def get_supabase() -> Optional[Client]:
     """Get or initialize Supabase client (without user auth token)"""
@@ -25,9 +77,9 @@ def get_supabase() -> Optional[Client]:
         
         if SUPABASE_URL and SUPABASE_ANON_KEY:
             try:
-                _supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+                _supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY, options=_client_options())
             except Exception as e:
-                print(f"Failed to initialize Supabase client: {e}")
+                logger.error("Failed to initialize Supabase client: %s", e)
                 return None
     
     return _supabase
@@ -42,41 +94,59 @@ def get_supabase_with_auth(auth_token: str) -> Optional[Client]:
     SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY", "")
     
     if not SUPABASE_URL or not SUPABASE_ANON_KEY:
-        print("❌ Supabase credentials not found")
+        logger.error("Supabase credentials not found")
         return None
     
     try:
-        # Create a new client
-        client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-        
-        # CRITICAL: Set the auth token using the auth.set_session method
-        # This properly configures the client for RLS policies
-        try:
-            # Use set_session to set the access token
-            # This is the correct way to authenticate the client for RLS
-            client.auth.set_session(access_token=auth_token, refresh_token="")
-            print(f"✅ Set auth token using set_session for RLS")
-        except Exception as auth_error:
-            # Fallback: Set headers directly if set_session fails
-            print(f"⚠️ set_session failed, trying direct header method: {auth_error}")
-            if hasattr(client, 'postgrest'):
-                # Set Authorization header for RLS to work
-                client.postgrest.headers["Authorization"] = f"Bearer {auth_token}"
-                client.postgrest.headers["apikey"] = SUPABASE_ANON_KEY
-                print(f"✅ Set auth token in postgrest headers for RLS (fallback)")
-            else:
-                print(f"⚠️ Warning: postgrest client not found, RLS may not work")
-        
-        return client
+        # Send the user's JWT as the Authorization header on every PostgREST call.
+        # Unlike auth.set_session this needs no auth session or refresh token, and
+        # the client stays bound to this token for its whole cached lifetime
+        options = _client_options()
+        options.headers["Authorization"] = f"Bearer {auth_token}"
+        return create_client(SUPABASE_URL, SUPABASE_ANON_KEY, options=options)
     except Exception as e:
-        print(f"❌ Failed to create Supabase client with auth token: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.error("Failed to create Supabase client with auth token: %s", e)
         return None
 
 
+def _token_expiry(auth_token: str) -> float:
+    """Unix time the JWT expires at (signature is checked by verify_token, not here)"""
+    try:
+        claims = jwt.decode(auth_token, options={"verify_signature": False})
+        return float(claims["exp"])
+    except Exception:
+        return time.time() + 60
+
+
+def get_cached_supabase_with_auth(auth_token: str) -> Optional[Client]:
+    """
+    Get an authenticated Supabase client, reusing the one built for this JWT
+    Repeat requests with the same token skip client construction
+    """
+    key = hashlib.blake2b(auth_token.encode(), digest_size=16).hexdigest()
+    with _authed_clients_lock:
+        cached = _authed_clients.get(key)
+    if cached is not None:
+        return cached[0]
+    
+    client = get_supabase_with_auth(auth_token)
+    if client is not None:
+        with _authed_clients_lock:
+            _authed_clients[key] = (client, _token_expiry(auth_token))
+    return client
+
+
 def init_supabase(url: str, key: str) -> Client:
     """Initialize Supabase client with provided credentials"""
     global _supabase
-    _supabase = create_client(url, key)
+    _supabase = create_client(url, key, options=_client_options())
     return _supabase
+
+
+async def run_query(query):
+    """Execute a Supabase query builder off the event loop.
+
+    The supabase-py client is synchronous, so calling .execute() inside an
+    async handler blocks every other request for the whole round-trip.
+    """
+    return await asyncio.to_thread(query.execute)
@@ -3,6 +3,11 @@ Backend error handling utilities
 """
 from fastapi import HTTPException
 from typing import Optional
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
 
 class AppError(Exception):
     """Custom application error"""
@@ -12,6 +17,16 @@ class AppError(Exception):
         self.status_code = status_code
         super().__init__(self.message)
 
+
+# RLS/permission rejections from PostgREST, compiled once and matched without lower-casing
+_PERMISSION_ERROR = re.compile(r"(?i:permission|policy)|RLS|PGRST|406")
+
+
+def is_permission_error(error) -> bool:
+    """Whether a Supabase error (or its message) is an RLS/permission rejection"""
+    return _PERMISSION_ERROR.search(str(error)) is not None
+
+
 def handle_error(error: Exception, default_message: str = "An error occurred") -> HTTPException:
     """Convert exceptions to HTTP exceptions"""
     if isinstance(error, AppError):
@@ -26,11 +41,8 @@ def handle_error(error: Exception, default_message: str = "An error occurred") -
             }
         )
     
-    # Log the actual error for debugging
-    import traceback
-    error_details = traceback.format_exc()
-    print(f"❌ Unhandled error: {type(error).__name__}: {str(error)}")
-    print(f"❌ Traceback:\n{error_details}")
+    # Log the actual error (with traceback) for debugging
+    logger.error("Unhandled error: %s: %s", type(error).__name__, error, exc_info=error)
     
     return HTTPException(
         status_code=500,
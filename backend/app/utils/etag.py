@@ -0,0 +1,28 @@
+"""
+Weak ETags and If-None-Match handling for conditional GETs
+"""
+import hashlib
+from typing import Iterable, Optional
+
+
+def row_etag(row: dict) -> str:
+    """Weak ETag of a single row: changes whenever the row's updated_at does"""
+    return f'W/"{row["id"]}:{row.get("updated_at")}"'
+
+
+def rows_etag(rows: Iterable[dict]) -> str:
+    """Weak ETag of an ordered list of rows: changes on any insert, delete, update or reorder"""
+    digest = hashlib.blake2b(digest_size=12)
+    for row in rows:
+        digest.update(f'{row["id"]}:{row.get("updated_at")};'.encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check with weak comparison (RFC 9110): a list of tags, W/ prefixes or *"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
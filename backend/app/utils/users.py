@@ -0,0 +1,57 @@
+"""
+Mapping between public.users rows and the camelCase user payloads the API returns
+"""
+from typing import Iterable, Tuple
+
+# (db column, API field, default, cast) for the profile fields read from a users row.
+# NUMERIC columns arrive as strings, so they carry a float cast
+USER_FIELDS = (
+    ("id", "id", None, None),
+    ("email", "email", None, None),
+    ("display_name", "displayName", "", None),
+    ("preferred_language", "preferredLanguage", "en", None),
+    ("user_number", "userNumber", None, None),
+    ("phone_number", "phoneNumber", None, None),
+    ("photo_url", "profileImageUrl", None, None),
+    ("theme", "theme", "auto", None),
+    ("is_verified", "isVerified", False, None),
+    ("verification_status", "verificationStatus", None, None),
+    ("hourly_rate", "hourlyRate", None, float),
+    ("bio", "bio", None, None),
+    ("address", "address", None, None),
+    ("city", "city", None, None),
+    ("country", "country", None, None),
+    ("latitude", "latitude", None, float),
+    ("longitude", "longitude", None, float),
+    ("is_active", "isActive", None, None),
+    ("last_active_at", "lastActiveAt", None, None),
+    ("created_at", "createdAt", None, None),
+)
+
+
+def user_fields(api_names: Iterable[str]) -> Tuple[tuple, ...]:
+    """The USER_FIELDS entries for a response model's field names"""
+    wanted = set(api_names)
+    return tuple(field for field in USER_FIELDS if field[1] in wanted)
+
+
+def user_columns(fields: Tuple[tuple, ...] = USER_FIELDS) -> str:
+    """PostgREST select list for user_row_to_dict with the same fields"""
+    columns = [db for db, _, _, _ in fields]
+    return ",".join(columns + [c for c in ("role", "created_at", "updated_at") if c not in columns])
+
+
+# Columns of the full profile payload; every /api/users query projects exactly these
+USER_COLUMNS = user_columns()
+
+
+def user_row_to_dict(user_data: dict, default_role: str = "parent", fields: Tuple[tuple, ...] = USER_FIELDS) -> dict:
+    """Convert a users row to a JSON-ready user payload with the given fields"""
+    # 0 is a real rate/coordinate, so casts skip only None
+    payload = {
+        api: cast(value) if cast and (value := user_data.get(db)) is not None else user_data.get(db, default)
+        for db, api, default, cast in fields
+    }
+    payload["role"] = user_data.get("role", default_role)
+    payload["updatedAt"] = user_data.get("updated_at") or user_data.get("created_at")
+    return payload
@@ -7,5 +7,6 @@ source venv/bin/activate
 # Load environment variables from .env
 export $(cat .env | grep -v '^#' | xargs)
 
-# Start the FastAPI server
-uvicorn app.main:app --reload --host 0.0.0.0 --port 8000
+# Start the FastAPI server (uvloop event loop + httptools parser, both from uvicorn[standard])
+# In production drop --reload and add --workers N
+uvicorn app.main:app --reload --loop uvloop --http httptools --host 0.0.0.0 --port 8000
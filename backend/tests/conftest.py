@@ -0,0 +1,84 @@
+"""
+Shared fixtures: an in-memory stand-in for the Supabase client and an HTTP client for the app
+"""
+import asyncio
+import os
+
+import httpx
+import pytest
+
+# Set before the app is imported; .env values never override these
+os.environ.setdefault("SUPABASE_URL", "https://test.supabase.co")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+
+from app.main import app
+from app.routes import admin, children, sessions, users
+from app.utils import auth
+from app.utils.auth import CurrentUser, get_authed_supabase, verify_token
+from tests.helpers import FakeSupabase
+
+
+class AppClient:
+    """Minimal sync HTTP client over the ASGI app (one event loop per request)"""
+    def request(self, method, url, **kwargs):
+        async def send():
+            # Unhandled errors become the app's 500 response, as they would behind uvicorn
+            transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.request(method, url, **kwargs)
+        return asyncio.run(send())
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    """Every test starts with empty module-level caches"""
+    caches = (
+        users._profile_rows, users._profile_fetches, users._sitter_pages, users._sitter_fetches,
+        sessions._missing_sessions, auth._verified_users, auth._verified_keys, auth._verifications,
+    )
+    for cache in caches:
+        cache.clear()
+    yield
+    for cache in caches:
+        cache.clear()
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Route every Supabase call made by the routers to a FakeSupabase"""
+    fake = FakeSupabase()
+    app.dependency_overrides[get_authed_supabase] = lambda: fake
+    for module in (admin, children, sessions, users):
+        if hasattr(module, "get_supabase"):
+            monkeypatch.setattr(module, "get_supabase", lambda: fake)
+    yield fake
+    app.dependency_overrides.pop(get_authed_supabase, None)
+
+
+@pytest.fixture
+def login():
+    """login(role, user_id) makes verify_token return that user"""
+    def set_user(role, user_id=None):
+        user = CurrentUser(user_id or f"{role}-1", f"{role}@example.com", role)
+        app.dependency_overrides[verify_token] = lambda: user
+        return user
+    yield set_user
+    app.dependency_overrides.pop(verify_token, None)
+
+
+@pytest.fixture
+def client():
+    return AppClient()
+
@@ -0,0 +1,82 @@
+"""
+Test doubles and small assertions shared by the test modules
+"""
+import threading
+
+
+class FakeResponse:
+    """What execute() returns: the rows (or scalar) in .data"""
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    """Records every builder call; execute() returns the next queued response"""
+    def __init__(self, db, name, args):
+        self.db = db
+        self.calls = [(name, args)]
+        db.queries.append(self.calls)
+
+    def __getattr__(self, name):
+        def method(*args, **kwargs):
+            self.calls.append((name, args))
+            return self
+        return method
+
+    @property
+    def not_(self):
+        return self
+
+    def execute(self):
+        result = self.db.results.pop(0) if self.db.results else FakeResponse([])
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def method_names(self):
+        return [name for name, _ in self.calls]
+
+
+class FakeSupabase:
+    """Supabase client stand-in: queue responses with respond(), inspect queries afterwards"""
+    def __init__(self):
+        self.results = []
+        self.queries = []
+
+    def respond(self, *results):
+        for result in results:
+            self.results.append(result if isinstance(result, Exception) else FakeResponse(result))
+
+    def table(self, name):
+        return FakeQuery(self, "table", (name,))
+
+    def rpc(self, name, params=None):
+        return FakeQuery(self, "rpc", (name, params))
+
+    def updates(self):
+        return [q for q in self.queries if any(name == "update" for name, _ in q)]
+
+
+def error_of(response) -> dict:
+    """The {"code", "message"} error of a 4xx/5xx body (AppError or HTTPException shape)"""
+    body = response.json()
+    return body["error"] if "error" in body else body["detail"]["error"]
+
+
+class GatedSupabase(FakeSupabase):
+    """FakeSupabase whose first query blocks in execute() until release is set"""
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def table(self, name):
+        return self._gate(super().table(name))
+
+    def rpc(self, name, params=None):
+        return self._gate(super().rpc(name, params))
+
+    def _gate(self, query):
+        if len(self.queries) == 1:
+            execute = query.execute
+            query.execute = lambda: self.release.wait(5) and execute()
+        return query
@@ -0,0 +1,120 @@
+"""
+verify_token: per-token caching and eviction when an admin changes or deletes the user
+"""
+import asyncio
+import time
+
+import jwt
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.utils import auth
+from tests.helpers import FakeSupabase, GatedSupabase
+
+SECRET = "test-jwt-secret-0123456789abcdef0123"
+
+USER_ROW = {"id": "user-1", "email": "user@example.com", "role": "parent", "created_at": "2026-01-01T00:00:00+00:00"}
+
+
+@pytest.fixture
+def auth_db(monkeypatch):
+    """Supabase stand-in for the auth module, with local JWT verification"""
+    fake = FakeSupabase()
+    monkeypatch.setattr(auth, "SUPABASE_JWT_SECRET", SECRET)
+    monkeypatch.setattr(auth, "get_supabase", lambda: fake)
+    monkeypatch.setattr(auth, "get_cached_supabase_with_auth", lambda token: fake)
+    return fake
+
+
+def _token(user_id="user-1"):
+    claims = {"sub": user_id, "email": f"{user_id}@example.com", "aud": "authenticated", "exp": int(time.time()) + 3600}
+    return jwt.encode(claims, SECRET, algorithm="HS256")
+
+
+def _verify(token):
+    return asyncio.run(auth.verify_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)))
+
+
+def test_repeat_calls_are_served_from_cache(auth_db):
+    auth_db.respond("admin")
+    token = _token()
+
+    assert _verify(token).role == "admin"
+    assert _verify(token).role == "admin"
+    assert len(auth_db.queries) == 1
+
+
+def test_admin_role_change_evicts_cached_role(auth_db, client, db, login):
+    auth_db.respond("admin", "parent")
+    token = _token()
+    assert _verify(token).role == "admin"
+
+    login("admin", "admin-1")
+    db.respond([USER_ROW])
+    assert client.put("/api/admin/users/user-1", json={"role": "parent"}).status_code == 200
+
+    assert _verify(token).role == "parent"
+    assert len(auth_db.queries) == 2
+
+
+def test_admin_delete_evicts_cached_user(auth_db, client, db, login):
+    auth_db.respond("sitter", None)
+    token = _token()
+    assert _verify(token).role == "sitter"
+
+    login("admin", "admin-1")
+    assert client.delete("/api/admin/users/user-1").status_code == 200
+
+    _verify(token)
+    assert len(auth_db.queries) == 2
+
+
+def test_eviction_is_per_user(auth_db):
+    auth_db.respond("parent", "sitter")
+    first, second = _token("user-1"), _token("user-2")
+    _verify(first)
+    _verify(second)
+
+    auth.forget_verified_user("user-2")
+
+    assert _verify(first).role == "parent"
+    assert len(auth_db.queries) == 2
+
+
+def _gated_auth_db(monkeypatch):
+    gated = GatedSupabase()
+    monkeypatch.setattr(auth, "SUPABASE_JWT_SECRET", SECRET)
+    monkeypatch.setattr(auth, "get_supabase", lambda: gated)
+    monkeypatch.setattr(auth, "get_cached_supabase_with_auth", lambda token: gated)
+    return gated
+
+
+def test_concurrent_requests_share_one_verification(monkeypatch):
+    gated = _gated_auth_db(monkeypatch)
+    gated.respond("sitter", "parent")
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=_token())
+
+    async def main():
+        pending = asyncio.gather(*(auth.verify_token(credentials) for _ in range(4)))
+        await asyncio.sleep(0.01)
+        gated.release.set()
+        return await pending
+
+    assert [user.role for user in asyncio.run(main())] == ["sitter"] * 4
+    assert len(gated.queries) == 1
+
+
+def test_role_change_during_verification_is_not_cached(monkeypatch):
+    gated = _gated_auth_db(monkeypatch)
+    gated.respond("admin", "parent")
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=_token())
+
+    async def main():
+        pending = asyncio.ensure_future(auth.verify_token(credentials))
+        await asyncio.sleep(0.01)
+        # An admin demotes the user while their role is being read
+        auth.forget_verified_user("user-1")
+        gated.release.set()
+        return (await pending).role, (await auth.verify_token(credentials)).role
+
+    assert asyncio.run(main()) == ("admin", "parent")
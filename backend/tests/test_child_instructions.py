@@ -0,0 +1,37 @@
+"""
+PUT /api/children/{id}/instructions: one upsert keyed on the child and its parent
+"""
+import pytest
+
+CHILD = {"id": "child-1", "parent_id": "parent-1", "name": "Noor", "created_at": "2026-01-01T00:00:00+00:00"}
+INSTRUCTIONS = {
+    "id": "ins-1",
+    "child_id": "child-1",
+    "parent_id": "parent-1",
+    "allergies": "peanuts",
+    "created_at": "2026-01-01T00:00:00+00:00",
+}
+
+
+@pytest.mark.parametrize("role, user_id", [("parent", "parent-1"), ("admin", "admin-1")])
+def test_upsert_uses_the_childs_parent(client, db, login, role, user_id):
+    login(role, user_id)
+    db.respond(CHILD, [INSTRUCTIONS])
+
+    response = client.put("/api/children/child-1/instructions", json={"allergies": "peanuts"})
+
+    assert response.status_code == 200
+    assert response.json()["parentId"] == "parent-1"
+    upsert = db.queries[1]
+    row = next(args[0] for name, args in upsert if name == "upsert")
+    assert row["child_id"] == "child-1"
+    assert row["parent_id"] == "parent-1"
+    assert len(db.queries) == 2
+
+
+def test_other_parents_are_refused_before_any_write(client, db, login):
+    login("parent", "parent-2")
+    db.respond(CHILD)
+
+    assert client.put("/api/children/child-1/instructions", json={"allergies": "none"}).status_code == 403
+    assert len(db.queries) == 1
@@ -0,0 +1,62 @@
+"""
+Per-user in-flight request limits
+"""
+import asyncio
+
+import httpx
+from fastapi import Depends, FastAPI
+
+from app.utils.auth import CurrentUser, verify_token
+from app.utils.concurrency import limit_concurrent_requests
+
+
+def _limited_app(max_in_flight, handler):
+    app = FastAPI()
+    slots = limit_concurrent_requests(max_in_flight)
+    app.add_api_route("/work", handler, dependencies=[Depends(slots)])
+    app.dependency_overrides[verify_token] = lambda: CurrentUser("user-1", "user@example.com", "parent")
+    return app
+
+
+async def _get(app, path="/work"):
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get(path)
+
+
+def test_request_over_the_limit_gets_429():
+    async def run():
+        release = asyncio.Event()
+
+        async def handler():
+            await release.wait()
+            return {"ok": True}
+
+        app = _limited_app(2, handler)
+        held = [asyncio.create_task(_get(app)) for _ in range(2)]
+        await asyncio.sleep(0.05)  # both are now inside the handler
+
+        rejected = await _get(app)
+        release.set()
+        accepted = await asyncio.gather(*held)
+        after = await _get(app)
+        return rejected, accepted, after
+
+    rejected, accepted, after = asyncio.run(run())
+    assert rejected.status_code == 429
+    assert rejected.json()["detail"]["error"]["code"] == "TOO_MANY_REQUESTS"
+    assert [r.status_code for r in accepted] == [200, 200]
+    assert after.status_code == 200
+
+
+def test_slot_is_released_when_the_handler_raises():
+    async def handler():
+        raise RuntimeError("boom")
+
+    app = _limited_app(1, handler)
+
+    async def run():
+        return [await _get(app) for _ in range(3)]
+
+    # With a leaked slot the second call would be a 429 instead of the handler's 500
+    assert [r.status_code for r in asyncio.run(run())] == [500, 500, 500]
@@ -0,0 +1,44 @@
+"""
+GET /api/sessions/discover/available
+"""
+from app.main import app
+
+SESSION = {
+    "id": "sess-1",
+    "parent_id": "parent-1",
+    "sitter_id": None,
+    "child_id": "child-1",
+    "status": "requested",
+    "start_time": "2026-01-01T10:00:00+00:00",
+    "created_at": "2026-01-01T00:00:00+00:00",
+    "updated_at": "2026-01-01T00:00:00+00:00",
+    "search_scope": "nationwide",
+    "hourly_rate": "12.50",
+}
+
+
+def test_rows_are_mapped_without_response_model_validation(client, db, login):
+    login("sitter", "sitter-1")
+    db.respond([SESSION])
+
+    response = client.get("/api/sessions/discover/available", params={"scope": "nationwide"})
+
+    assert response.status_code == 200
+    [session] = response.json()
+    assert session["id"] == "sess-1"
+    assert session["searchScope"] == "nationwide"
+    rpc = db.queries[0][0]
+    assert rpc == ("rpc", ("discover_sessions", {
+        "p_scope": "nationwide", "p_max_distance": None, "p_city": None, "p_limit": 100, "p_lat": None, "p_lon": None,
+    }))
+
+
+def test_openapi_still_documents_the_session_list():
+    schema = app.openapi()["paths"]["/api/sessions/discover/available"]["get"]["responses"]["200"]
+    assert schema["content"]["application/json"]["schema"]["items"]["$ref"].endswith("/SessionResponse")
+
+
+def test_parents_are_refused(client, db, login):
+    login("parent", "parent-1")
+    assert client.get("/api/sessions/discover/available").status_code == 403
+    assert db.queries == []
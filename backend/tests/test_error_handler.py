@@ -0,0 +1,23 @@
+"""
+Shared error classification
+"""
+import pytest
+
+from app.utils.error_handler import is_permission_error
+
+
+@pytest.mark.parametrize("message", [
+    "new row violates row-level security policy for table \"sessions\"",
+    "Permission denied for table users",
+    "RLS rejected the update",
+    "{'code': 'PGRST301', 'message': 'JWT expired'}",
+    "406 Not Acceptable",
+])
+def test_permission_errors(message):
+    assert is_permission_error(message)
+    assert is_permission_error(RuntimeError(message))
+
+
+@pytest.mark.parametrize("message", ["connection reset by peer", "duplicate key value violates unique constraint", "rls"])
+def test_other_errors(message):
+    assert not is_permission_error(message)
@@ -0,0 +1,70 @@
+"""
+Conditional GETs: If-None-Match matching and the ETags the routes send
+"""
+import pytest
+
+from app.utils.etag import etag_matches, row_etag, rows_etag
+
+SESSION = {
+    "id": "sess-1",
+    "parent_id": "parent-1",
+    "sitter_id": "sitter-1",
+    "child_id": "child-1",
+    "status": "requested",
+    "start_time": "2026-01-01T10:00:00+00:00",
+    "created_at": "2026-01-01T00:00:00+00:00",
+    "updated_at": "2026-01-01T00:00:00+00:00",
+    "search_scope": "invite",
+}
+TAG = 'W/"sess-1:2026-01-01T00:00:00+00:00"'
+
+
+@pytest.mark.parametrize("header", [
+    TAG,
+    TAG.removeprefix("W/"),
+    f'W/"other", {TAG}',
+    f'"a","b" ,  {TAG}',
+    "*",
+    " * ",
+])
+def test_matches(header):
+    assert etag_matches(header, TAG)
+
+
+@pytest.mark.parametrize("header", [None, "", 'W/"other"', 'W/"sess-1"', 'W/"other", "also-other"'])
+def test_does_not_match(header):
+    assert not etag_matches(header, TAG)
+
+
+def test_list_etag_changes_when_a_row_is_deleted():
+    rows = [{**SESSION, "id": f"sess-{i}", "updated_at": f"2026-01-0{i}T00:00:00+00:00"} for i in range(1, 4)]
+    # Dropping a row that isn't the newest keeps the newest updated_at
+    assert rows_etag(rows) != rows_etag([rows[0], rows[2]])
+    assert rows_etag(rows) != rows_etag(rows[::-1])
+    assert rows_etag(rows) == rows_etag([dict(row) for row in rows])
+
+
+def test_session_by_id_answers_304(client, db, login):
+    login("parent", "parent-1")
+    db.respond(SESSION, SESSION, SESSION)
+
+    first = client.get("/api/sessions/sess-1")
+    assert first.status_code == 200
+    assert first.headers["etag"] == row_etag(SESSION) == TAG
+
+    assert client.get("/api/sessions/sess-1", headers={"If-None-Match": f'"x", {TAG}'}).status_code == 304
+    assert client.get("/api/sessions/sess-1", headers={"If-None-Match": "*"}).status_code == 304
+
+
+def test_session_list_etag_follows_deletes(client, db, login):
+    login("parent", "parent-1")
+    rows = [{**SESSION, "id": f"sess-{i}"} for i in range(1, 4)]
+    db.respond(rows, rows, rows[:2])
+
+    etag = client.get("/api/sessions").headers["etag"]
+    assert client.get("/api/sessions", headers={"If-None-Match": etag}).status_code == 304
+
+    after_delete = client.get("/api/sessions", headers={"If-None-Match": etag})
+    assert after_delete.status_code == 200
+    assert after_delete.headers["etag"] != etag
+    assert [s["id"] for s in after_delete.json()] == ["sess-1", "sess-2"]
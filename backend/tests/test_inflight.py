@@ -0,0 +1,89 @@
+"""
+InFlight: shared loads, failures and cancelled waiters
+"""
+import asyncio
+
+import pytest
+
+from app.routes import users
+from app.utils.concurrency import InFlight
+from tests.helpers import FakeSupabase
+
+PROFILE = {
+    "id": "parent-1",
+    "email": "parent@example.com",
+    "role": "parent",
+    "created_at": "2026-01-01T00:00:00+00:00",
+    "updated_at": "2026-01-01T00:00:00+00:00",
+}
+
+
+def test_concurrent_callers_share_one_load():
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "row"
+
+    async def main():
+        inflight = InFlight()
+        results = await asyncio.gather(*(inflight.run("k", load) for _ in range(5)))
+        return results, len(inflight)
+
+    results, pending = asyncio.run(main())
+    assert results == ["row"] * 5
+    assert calls == [1]
+    assert pending == 0
+
+
+def test_failed_load_is_not_reused():
+    attempts = []
+
+    async def load():
+        attempts.append(1)
+        await asyncio.sleep(0)
+        if len(attempts) == 1:
+            raise RuntimeError("connection reset")
+        return "row"
+
+    async def main():
+        inflight = InFlight()
+        first = await asyncio.gather(inflight.run("k", load), inflight.run("k", load), return_exceptions=True)
+        return first, await inflight.run("k", load)
+
+    first, retry = asyncio.run(main())
+    assert [type(result) for result in first] == [RuntimeError, RuntimeError]
+    assert retry == "row"
+    assert len(attempts) == 2
+
+
+def test_cancelled_waiter_leaves_the_load_running():
+    async def load():
+        await asyncio.sleep(0.01)
+        return "row"
+
+    async def main():
+        inflight = InFlight()
+        leaving = asyncio.ensure_future(inflight.run("k", load))
+        staying = asyncio.ensure_future(inflight.run("k", load))
+        await asyncio.sleep(0)
+        leaving.cancel()
+        return await staying, leaving.cancelled()
+
+    assert asyncio.run(main()) == ("row", True)
+
+
+def test_failed_profile_read_is_not_cached():
+    db = FakeSupabase()
+    db.respond(RuntimeError("connection reset"), PROFILE)
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await users._fetch_user_row(db, "parent-1")
+        assert "parent-1" not in users._profile_rows
+        return await users._fetch_user_row(db, "parent-1")
+
+    assert asyncio.run(main()) == PROFILE
+    assert users._profile_rows["parent-1"] == PROFILE
+    assert len(db.queries) == 2
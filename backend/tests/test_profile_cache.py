@@ -0,0 +1,43 @@
+"""
+Profile cache consistency when PUT /api/users/me overlaps a GET /me read
+"""
+import asyncio
+
+from app.routes import users
+from app.utils.auth import CurrentUser
+from tests.helpers import GatedSupabase
+
+OLD = {
+    "id": "parent-1",
+    "email": "parent@example.com",
+    "role": "parent",
+    "display_name": "Amina",
+    "created_at": "2026-01-01T00:00:00+00:00",
+    "updated_at": "2026-01-01T00:00:00+00:00",
+}
+NEW = {**OLD, "display_name": "Amina K", "updated_at": "2026-02-01T00:00:00+00:00"}
+
+
+def test_put_during_read_keeps_the_new_row():
+    db = GatedSupabase()
+    # The gated read executes last, so it gets the older row
+    db.respond([NEW], OLD)
+    user = CurrentUser("parent-1", "parent@example.com", "parent")
+
+    async def main():
+        read = asyncio.ensure_future(users._fetch_user_row(db, "parent-1"))
+        await asyncio.sleep(0.01)
+        updated = await users.update_current_user_profile(
+            users.UpdateProfileRequest(displayName="Amina K"), current_user=user, supabase=db
+        )
+        db.release.set()
+        return await read, updated, await users._fetch_user_row(db, "parent-1")
+
+    read_row, updated, later = asyncio.run(main())
+    # The overtaken read still answers its own caller...
+    assert read_row == OLD
+    assert updated.displayName == "Amina K"
+    # ...but the cache, and every read after the PUT, has the new row
+    assert users._profile_rows["parent-1"] == NEW
+    assert later == NEW
+    assert len(db.queries) == 2
@@ -0,0 +1,39 @@
+"""
+GET /api/users/me conditional requests
+"""
+
+PROFILE = {
+    "id": "parent-1",
+    "email": "parent@example.com",
+    "role": "parent",
+    "display_name": "Amina",
+    "created_at": "2026-01-01T00:00:00+00:00",
+    "updated_at": "2026-01-01T00:00:00+00:00",
+}
+
+
+def test_unchanged_profile_answers_304(client, db, login):
+    login("parent", "parent-1")
+    db.respond(PROFILE)
+
+    etag = client.get("/api/users/me").headers["etag"]
+    # Served from the profile cache; no second query
+    response = client.get("/api/users/me", headers={"If-None-Match": f'W/"stale", {etag}'})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert len(db.queries) == 1
+
+
+def test_etag_changes_after_put_me(client, db, login):
+    login("parent", "parent-1")
+    updated = {**PROFILE, "display_name": "Amina K", "updated_at": "2026-02-01T00:00:00+00:00"}
+    db.respond(PROFILE, [updated])
+
+    etag = client.get("/api/users/me").headers["etag"]
+    assert client.put("/api/users/me", json={"displayName": "Amina K"}).status_code == 200
+
+    response = client.get("/api/users/me", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["displayName"] == "Amina K"
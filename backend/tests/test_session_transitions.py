@@ -0,0 +1,56 @@
+"""
+validate_status_transition: the precomputed verdict table must agree with the plain rules
+"""
+import itertools
+
+import pytest
+
+from app.routes.sessions import _TERMINAL, _TRANSITION_ERRORS, _VALID_TRANSITIONS, validate_status_transition
+
+STATUSES = sorted(_VALID_TRANSITIONS) + ["unknown"]
+ROLES = ["parent", "sitter", "admin", "unknown"]
+SESSIONS = [
+    {"search_scope": "city", "sitter_id": None, "current_user_id": "sitter-1"},
+    {"search_scope": "invite", "sitter_id": "sitter-1", "current_user_id": "sitter-1"},
+    {"search_scope": "invite", "sitter_id": "sitter-2", "current_user_id": "sitter-1"},
+]
+
+
+def reference_transition(current_status, new_status, user_role, session_data):
+    """The state machine written out rule by rule, as it was before the lookup table"""
+    if current_status in _TERMINAL:
+        return False, f"Cannot change status from {current_status} (terminal state)"
+    if new_status not in _VALID_TRANSITIONS.get(current_status, frozenset()):
+        return False, f"Invalid status transition from {current_status} to {new_status}"
+    if new_status == 'accepted':
+        if user_role != 'sitter':
+            return False, "Only sitters can accept session requests"
+        if session_data.get('search_scope') == 'invite' and session_data.get('sitter_id') != session_data.get('current_user_id'):
+            return False, "This session was not invited to you"
+    if new_status == 'active':
+        if user_role != 'sitter':
+            return False, "Only sitters can start sessions"
+        if current_status != 'accepted':
+            return False, "Session must be accepted before it can be started"
+    if new_status == 'completed':
+        if user_role != 'sitter':
+            return False, "Only sitters can complete sessions"
+        if current_status != 'active':
+            return False, "Session must be active before it can be completed"
+    return True, ""
+
+
+@pytest.mark.parametrize("current_status,new_status,user_role", itertools.product(STATUSES, STATUSES, ROLES))
+def test_table_matches_rules(current_status, new_status, user_role):
+    for session_data in SESSIONS:
+        expected = reference_transition(current_status, new_status, user_role, session_data)
+        assert validate_status_transition(current_status, new_status, user_role, session_data) == expected
+
+
+def test_unknown_inputs_take_the_fallback_path():
+    assert ("accepted", "active", "unknown") not in _TRANSITION_ERRORS
+    assert ("unknown", "cancelled", "parent") not in _TRANSITION_ERRORS
+    assert validate_status_transition("accepted", "active", "unknown", {}) == (False, "Only sitters can start sessions")
+    assert validate_status_transition("unknown", "cancelled", "parent", {}) == (
+        False, "Invalid status transition from unknown to cancelled"
+    )
@@ -0,0 +1,78 @@
+"""
+PUT /api/sessions/{id}: the conditional-UPDATE fast path and its fallback errors
+"""
+import pytest
+
+from tests.helpers import error_of
+
+SESSION = {
+    "id": "sess-1",
+    "parent_id": "parent-1",
+    "sitter_id": "sitter-1",
+    "child_id": "child-1",
+    "status": "accepted",
+    "start_time": "2026-01-01T10:00:00+00:00",
+    "created_at": "2026-01-01T00:00:00+00:00",
+    "updated_at": "2026-01-01T00:00:00+00:00",
+    "search_scope": "invite",
+}
+
+
+def _put(client, status):
+    return client.put("/api/sessions/sess-1", json={"status": status})
+
+
+def test_sitter_start_is_a_single_conditional_update(client, db, login):
+    login("sitter", "sitter-1")
+    db.respond([{**SESSION, "status": "active"}])
+
+    response = _put(client, "active")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "active"
+    assert len(db.queries) == 1
+    calls = db.queries[0]
+    assert ("in_", ("status", ["accepted"])) in calls
+    assert ("eq", ("sitter_id", "sitter-1")) in calls
+
+
+@pytest.mark.parametrize("status", ["active", "completed"])
+def test_parent_cannot_start_or_complete(client, db, login, status):
+    login("parent", "parent-1")
+    db.respond({**SESSION, "status": "accepted" if status == "active" else "active"})
+
+    response = _put(client, status)
+
+    assert response.status_code == 400
+    assert error_of(response)["code"] == "INVALID_STATUS_TRANSITION"
+    # Sitter-only targets skip the fast path: one read, no UPDATE
+    assert len(db.queries) == 1
+    assert db.updates() == []
+
+
+def test_unassigned_sitter_cannot_start(client, db, login):
+    login("sitter", "sitter-2")
+    db.respond([], SESSION)  # conditional UPDATE matches nothing, then the read
+
+    response = _put(client, "active")
+
+    assert response.status_code == 403
+    assert error_of(response)["code"] == "FORBIDDEN"
+    assert len(db.queries) == 2
+    assert len(db.updates()) == 1
+
+
+@pytest.mark.parametrize("current", ["cancelled", "completed"])
+def test_terminal_session_cannot_be_cancelled(client, db, login, current):
+    login("parent", "parent-1")
+    db.respond([], {**SESSION, "status": current})
+
+    response = _put(client, "cancelled")
+
+    assert response.status_code == 400
+    error = error_of(response)
+    assert error["code"] == "INVALID_STATUS_TRANSITION"
+    assert "terminal" in error["message"]
+    # UPDATE -> read -> 4xx: the miss never costs a second UPDATE
+    assert len(db.queries) == 2
+    assert len(db.updates()) == 1
@@ -0,0 +1,63 @@
+"""
+PUT /api/users/me and the cached verified-sitter pages
+"""
+from app.routes import users
+
+SITTER = {
+    "id": "sitter-1",
+    "email": "sitter@example.com",
+    "role": "sitter",
+    "is_verified": True,
+    "is_active": True,
+    "bio": "Five years with toddlers",
+    "created_at": "2026-01-01T00:00:00+00:00",
+    "updated_at": "2026-01-01T00:00:00+00:00",
+}
+PAGE_KEY = ("nationwide", None, None, 20, None)
+
+
+def _cache_page():
+    users._sitter_pages[PAGE_KEY] = (b"[]", None)
+
+
+def test_edit_that_changes_nothing_listed_keeps_pages(client, db, login):
+    login("sitter", "sitter-1")
+    users._profile_rows["sitter-1"] = SITTER
+    _cache_page()
+    db.respond([{**SITTER, "updated_at": "2026-02-01T00:00:00+00:00"}])
+
+    response = client.put("/api/users/me", json={"bio": SITTER["bio"]})
+
+    assert response.status_code == 200
+    assert PAGE_KEY in users._sitter_pages
+
+
+def test_edit_of_a_listed_field_clears_pages(client, db, login):
+    login("sitter", "sitter-1")
+    users._profile_rows["sitter-1"] = SITTER
+    _cache_page()
+    db.respond([{**SITTER, "bio": "Now also infants"}])
+
+    response = client.put("/api/users/me", json={"bio": "Now also infants"})
+
+    assert response.status_code == 200
+    assert response.json()["bio"] == "Now also infants"
+    assert len(users._sitter_pages) == 0
+
+
+def test_edit_without_a_cached_row_clears_pages(client, db, login):
+    login("sitter", "sitter-1")
+    _cache_page()
+    db.respond([SITTER])
+
+    assert client.put("/api/users/me", json={"bio": SITTER["bio"]}).status_code == 200
+    assert len(users._sitter_pages) == 0
+
+
+def test_parent_edit_keeps_pages(client, db, login):
+    login("parent", "parent-1")
+    _cache_page()
+    db.respond([{**SITTER, "id": "parent-1", "role": "parent", "bio": "New bio"}])
+
+    assert client.put("/api/users/me", json={"bio": "New bio"}).status_code == 200
+    assert PAGE_KEY in users._sitter_pages
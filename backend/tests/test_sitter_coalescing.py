@@ -0,0 +1,56 @@
+"""
+Verified-sitter pages: concurrent misses share one query; a clear mid-flight skips the cache
+"""
+import asyncio
+
+import orjson
+
+from app.routes import users
+from tests.helpers import FakeSupabase, GatedSupabase
+
+SITTER = {
+    "id": "sitter-1",
+    "email": "sitter@example.com",
+    "role": "sitter",
+    "is_verified": True,
+    "created_at": "2026-01-01T00:00:00+00:00",
+}
+KEY = (None, None, None, None, 20, None)
+
+
+def _load(db):
+    query = db.rpc("get_verified_sitters", {})
+    return users._sitter_fetches.run(KEY, lambda: users._load_sitter_page(query, 20, KEY))
+
+
+def test_concurrent_misses_share_one_query():
+    db = FakeSupabase()
+    db.respond([SITTER], [SITTER])
+
+    async def main():
+        return await asyncio.gather(*(_load(db) for _ in range(3)))
+
+    pages = asyncio.run(main())
+    assert len({id(page) for page in pages}) == 1
+    assert orjson.loads(pages[0][0])[0]["id"] == "sitter-1"
+    assert users._sitter_pages[KEY] == pages[0]
+    # Each caller builds its query, but only the first one runs
+    assert len(db.results) == 1
+
+
+def test_clear_during_query_does_not_cache_the_page():
+    db = GatedSupabase()
+    db.respond([SITTER])
+
+    async def main():
+        pending = asyncio.ensure_future(_load(db))
+        await asyncio.sleep(0.01)
+        # A sitter's PUT /me (or an admin edit) lands while the query runs
+        users._sitter_pages.clear()
+        users._sitter_fetches.clear()
+        db.release.set()
+        return await pending
+
+    body, _cursor = asyncio.run(main())
+    assert orjson.loads(body)[0]["id"] == "sitter-1"
+    assert KEY not in users._sitter_pages
@@ -0,0 +1,93 @@
+"""
+GET /api/users/sitters/verified keyset cursors
+"""
+import base64
+
+import orjson
+import pytest
+
+from app.main import app
+from app.routes.users import _decode_sitter_cursor, _encode_sitter_cursor
+from app.utils.auth import get_authed_supabase
+from app.utils.error_handler import AppError
+from tests.helpers import FakeResponse, FakeSupabase, error_of
+
+# Five sitters, three of them created in the same instant
+SITTERS = [
+    {"id": sitter_id, "email": f"{sitter_id}@example.com", "role": "sitter", "is_verified": True, "created_at": created_at}
+    for sitter_id, created_at in [
+        ("a1", "2026-01-03T00:00:00+00:00"),
+        ("b2", "2026-01-02T00:00:00+00:00"),
+        ("c3", "2026-01-02T00:00:00+00:00"),
+        ("d4", "2026-01-02T00:00:00+00:00"),
+        ("e5", "2026-01-01T00:00:00+00:00"),
+    ]
+]
+
+
+class KeysetSitters(FakeSupabase):
+    """get_verified_sitters over SITTERS with the SQL function's ordering and keyset filter"""
+    def rpc(self, name, params=None):
+        query = super().rpc(name, params)
+        query.execute = lambda: FakeResponse(self._page(params))
+        return query
+
+    @staticmethod
+    def _page(params):
+        rows = sorted(SITTERS, key=lambda row: (row["created_at"], row["id"]), reverse=True)
+        if params["p_after_created_at"] is not None:
+            after = (params["p_after_created_at"], params["p_after_id"])
+            rows = [row for row in rows if (row["created_at"], row["id"]) < after]
+        return rows[:params["p_limit"]]
+
+
+@pytest.fixture
+def sitters_db():
+    fake = KeysetSitters()
+    app.dependency_overrides[get_authed_supabase] = lambda: fake
+    yield fake
+    app.dependency_overrides.pop(get_authed_supabase, None)
+
+
+def test_cursor_round_trip():
+    row = {"created_at": "2026-01-02T00:00:00.123456+00:00", "id": "0b1e5c2a-9f3d-4e6b-8a7c-1d2e3f4a5b6c"}
+    cursor = _encode_sitter_cursor(row)
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+    assert _decode_sitter_cursor(cursor) == (row["created_at"], row["id"])
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    base64.urlsafe_b64encode(b"plain text").decode(),
+    base64.urlsafe_b64encode(orjson.dumps({"created_at": "x"})).decode(),
+    base64.urlsafe_b64encode(orjson.dumps(["only-one"])).decode(),
+])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(AppError) as raised:
+        _decode_sitter_cursor(cursor)
+    assert raised.value.code == "INVALID_CURSOR"
+
+
+def test_malformed_cursor_is_a_400(client, sitters_db, login):
+    login("parent")
+    response = client.get("/api/users/sitters/verified", params={"cursor": "not a cursor!"})
+    assert response.status_code == 400
+    assert error_of(response)["code"] == "INVALID_CURSOR"
+    assert sitters_db.queries == []
+
+
+def test_pages_with_equal_created_at_neither_skip_nor_repeat(client, sitters_db, login):
+    login("parent")
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/users/sitters/verified", params=params)
+        assert response.status_code == 200
+        seen += [sitter["id"] for sitter in response.json()]
+        pages += 1
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+
+    assert seen == ["a1", "d4", "c3", "b2", "e5"]
+    assert pages == 3
@@ -0,0 +1,56 @@
+"""
+Shared users row mapping (app.utils.users) and the admin projection
+"""
+from app.utils.users import USER_COLUMNS, user_columns, user_fields, user_row_to_dict
+
+ROW = {
+    "id": "sitter-1",
+    "email": "sitter@example.com",
+    "role": "sitter",
+    "hourly_rate": "0",
+    "latitude": "-1.95",
+    "created_at": "2026-01-01T00:00:00+00:00",
+}
+
+
+def test_row_to_dict_defaults_and_casts():
+    payload = user_row_to_dict(ROW)
+    assert payload["hourlyRate"] == 0.0
+    assert payload["latitude"] == -1.95
+    assert payload["longitude"] is None
+    assert payload["theme"] == "auto"
+    assert payload["role"] == "sitter"
+    assert payload["updatedAt"] == ROW["created_at"]
+
+
+def test_subset_maps_only_its_fields():
+    fields = user_fields(["id", "email", "createdAt"])
+    assert user_row_to_dict(ROW, fields=fields) == {
+        "id": "sitter-1",
+        "email": "sitter@example.com",
+        "createdAt": ROW["created_at"],
+        "role": "sitter",
+        "updatedAt": ROW["created_at"],
+    }
+    assert user_columns(fields) == "id,email,created_at,role,updated_at"
+
+
+def test_full_columns_cover_every_field():
+    columns = USER_COLUMNS.split(",")
+    assert len(columns) == len(set(columns))
+    assert {"latitude", "is_active", "role", "updated_at"} <= set(columns)
+
+
+def test_admin_users_select_only_what_they_return(client, db, login):
+    login("admin")
+    db.respond([ROW])
+
+    response = client.get("/api/admin/users")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body[0]["hourlyRate"] == 0.0
+    assert "latitude" not in body[0]
+    select = next(args for name, args in db.queries[0] if name == "select")
+    assert "latitude" not in select[0] and "is_active" not in select[0]
+    assert "bio" in select[0]
@@ -3,6 +3,8 @@
 
 -- Enable UUID extension
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+-- PostGIS for radius search on session locations
+CREATE EXTENSION IF NOT EXISTS postgis;
 
 -- ============================================
 -- USER REGISTRATION SYNC: auth.users <-> public.users
@@ -75,6 +77,45 @@ $$;
 GRANT EXECUTE ON FUNCTION create_user_profile(UUID, TEXT, TEXT, TEXT, TEXT, TEXT, TEXT, TEXT, TEXT, BOOLEAN, TEXT, DECIMAL, TEXT) TO authenticated;
 GRANT EXECUTE ON FUNCTION create_user_profile(UUID, TEXT, TEXT, TEXT, TEXT, TEXT, TEXT, TEXT, TEXT, BOOLEAN, TEXT, DECIMAL, TEXT) TO anon;
 
+-- Return the caller's role, creating a minimal profile first if they have none
+-- (used by the backend on token verification: one round trip instead of
+-- select role -> create_user_profile -> select role again)
+-- Existing rows are only read, never updated, so updated_at stays untouched
+CREATE OR REPLACE FUNCTION get_or_create_user_profile(
+  p_id UUID,
+  p_email TEXT,
+  p_role TEXT DEFAULT NULL
+)
+RETURNS TEXT
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_role TEXT;
+BEGIN
+  -- SECURITY DEFINER bypasses RLS, so only allow callers to touch their own row
+  IF p_id IS DISTINCT FROM auth.uid() THEN
+    RAISE EXCEPTION 'Cannot read or create another user''s profile';
+  END IF;
+
+  SELECT role INTO v_role FROM users WHERE id = p_id;
+  IF FOUND THEN
+    RETURN v_role;
+  END IF;
+
+  INSERT INTO users (id, email, role, created_at, updated_at)
+  VALUES (p_id, p_email, COALESCE(p_role, 'parent'), NOW(), NOW())
+  ON CONFLICT (id) DO NOTHING;
+
+  -- Re-read: a concurrent sign-up may have inserted the row with another role
+  SELECT role INTO v_role FROM users WHERE id = p_id;
+  RETURN v_role;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION get_or_create_user_profile(UUID, TEXT, TEXT) TO authenticated;
+
 -- Trigger function to auto-sync auth.users to public.users on INSERT
 CREATE OR REPLACE FUNCTION handle_auth_user_created()
 RETURNS TRIGGER AS $$
@@ -251,6 +292,17 @@ CREATE TABLE IF NOT EXISTS sessions (
 CREATE INDEX IF NOT EXISTS idx_users_is_active ON users(is_active) WHERE role = 'sitter' AND is_active = TRUE;
 CREATE INDEX IF NOT EXISTS idx_users_city ON users(city) WHERE role = 'sitter';
 CREATE INDEX IF NOT EXISTS idx_users_location ON users(latitude, longitude) WHERE role = 'sitter' AND latitude IS NOT NULL AND longitude IS NOT NULL;
+-- Verified-sitter browse (GET /api/users/sitters/verified): newest first with id as the
+-- tie-breaker, so each keyset page reads the next few index entries instead of sorting
+-- every verified sitter
+DROP INDEX IF EXISTS idx_users_verified_sitters;
+CREATE INDEX IF NOT EXISTS idx_users_verified_sitters_keyset ON users(created_at DESC, id DESC)
+WHERE role = 'sitter' AND is_verified = TRUE;
+-- City mode of the same browse: equality on city, then the keyset order, over available
+-- (active) verified sitters only. get_verified_sitters adds u.city = p_city and the cursor
+-- as plain conditions in this mode, so a page is a range scan of the next p_limit entries
+CREATE INDEX IF NOT EXISTS idx_users_active_sitters_city ON users(city, created_at DESC, id DESC)
+WHERE role = 'sitter' AND is_verified = TRUE AND is_active = TRUE;
 
 -- Index for sessions search_scope
 CREATE INDEX IF NOT EXISTS idx_sessions_search_scope ON sessions(search_scope) WHERE search_scope != 'invite';
@@ -352,8 +404,35 @@ CREATE INDEX IF NOT EXISTS idx_sessions_cancelled_by ON sessions(cancelled_by) W
 
 -- Indexes for request expiration (for babysitter requests feed)
 CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at) WHERE expires_at IS NOT NULL;
-CREATE INDEX IF NOT EXISTS idx_sessions_not_expired ON sessions(expires_at) 
-WHERE status = 'requested' AND (expires_at IS NULL OR expires_at > NOW());
+-- Open-request feed: discover filters status = 'requested' plus expires_at in SQL and orders by start_time.
+-- (Index predicates must be immutable, so expiry cannot live in the WHERE clause here.)
+CREATE INDEX IF NOT EXISTS idx_sessions_requested_start_time ON sessions(start_time)
+WHERE status = 'requested';
+-- Scope-filtered discover: discover_sessions' nationwide branch and the nearby/city
+-- leftovers (no coordinates / no city) read one search_scope in start_time order and stop
+-- at the limit; the INCLUDE columns let the expiry and distance checks run off the index
+-- before any heap fetch. location is left out on purpose (large JSON text; the city match
+-- uses idx_sessions_requested_city).
+-- On a live database build it with CREATE INDEX CONCURRENTLY outside a transaction.
+CREATE INDEX IF NOT EXISTS idx_sessions_open_scope_start ON sessions(search_scope, start_time)
+INCLUDE (sitter_id, expires_at, max_distance_km)
+WHERE status = 'requested';
+-- Open invites by invited sitter: discover_sessions reads the caller's invites (pinned at
+-- the top of the feed, or all of ?scope=invite) as sitter_id = auth.uid() in start_time
+-- order, a straight seek instead of walking every open invite
+CREATE INDEX IF NOT EXISTS idx_sessions_open_invites ON sessions(sitter_id, start_time)
+WHERE status = 'requested' AND search_scope = 'invite';
+
+-- The open-request set is a small, fast-churning slice of sessions (requests are accepted,
+-- cancelled or expire within hours). Vacuum/analyze sessions well before the 10%/20% defaults
+-- so the partial indexes above stay compact and the planner's estimates for them stay fresh,
+-- and let it see that status and search_scope are correlated.
+ALTER TABLE sessions SET (
+  autovacuum_vacuum_scale_factor = 0.02,
+  autovacuum_analyze_scale_factor = 0.01
+);
+CREATE STATISTICS IF NOT EXISTS sessions_status_scope_stats (dependencies, mcv)
+  ON status, search_scope FROM sessions;
 
 -- ============================================
 -- MIGRATION SCRIPTS FOR EXISTING DATABASES
@@ -458,15 +537,268 @@ $$;
 GRANT EXECUTE ON FUNCTION get_user_role(UUID) TO authenticated;
 GRANT EXECUTE ON FUNCTION get_user_role(UUID) TO anon;
 
+-- City from a session's location (TEXT holding JSON like {"address": ..., "city": ...}).
+-- Returns NULL instead of raising when the location is a plain address rather than JSON.
+CREATE OR REPLACE FUNCTION session_location_city(p_location TEXT)
+RETURNS TEXT
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+BEGIN
+  RETURN p_location::jsonb ->> 'city';
+EXCEPTION WHEN others THEN
+  RETURN NULL;
+END;
+$$;
+
+-- City extracted once at write time so discovery filters on a plain indexed column
+-- instead of parsing the location JSON per row on every read
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS location_city TEXT
+  GENERATED ALWAYS AS (session_location_city(location)) STORED;
+-- discover_sessions' city branch filters lower(location_city) = the sitter's city as a
+-- plain condition, so it reads only that city's open requests
+CREATE INDEX IF NOT EXISTS idx_sessions_requested_city ON sessions(lower(location_city))
+WHERE status = 'requested' AND search_scope = 'city';
+
+-- Point from a session's location JSON ({"coordinates": {"latitude": .., "longitude": ..}}).
+-- NULL when the location has no coordinates or is not JSON.
+CREATE OR REPLACE FUNCTION session_location_geo(p_location TEXT)
+RETURNS geography
+LANGUAGE plpgsql
+IMMUTABLE
+SET search_path = public, extensions
+AS $$
+DECLARE
+  coords JSONB;
+BEGIN
+  coords := p_location::jsonb -> 'coordinates';
+  IF coords ->> 'latitude' IS NULL OR coords ->> 'longitude' IS NULL THEN
+    RETURN NULL;
+  END IF;
+  RETURN ST_SetSRID(
+    ST_MakePoint((coords ->> 'longitude')::float8, (coords ->> 'latitude')::float8),
+    4326
+  )::geography;
+EXCEPTION WHEN others THEN
+  RETURN NULL;
+END;
+$$;
+
+-- Geography point for nearby discovery; discover_sessions' nearby branch tests
+-- ST_DWithin(location_geo, ...) as a plain condition, which this GiST index answers
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS location_geo geography(Point, 4326)
+  GENERATED ALWAYS AS (session_location_geo(location)) STORED;
+CREATE INDEX IF NOT EXISTS idx_sessions_requested_geo ON sessions USING GIST (location_geo)
+WHERE status = 'requested' AND search_scope = 'nearby';
+
+-- Point from a user's latitude/longitude columns; NULL unless both are set
+CREATE OR REPLACE FUNCTION user_location_geo(p_latitude NUMERIC, p_longitude NUMERIC)
+RETURNS geography
+LANGUAGE sql
+IMMUTABLE
+SET search_path = public, extensions
+AS $$
+  SELECT CASE WHEN p_latitude IS NOT NULL AND p_longitude IS NOT NULL
+    THEN ST_SetSRID(ST_MakePoint(p_longitude::float8, p_latitude::float8), 4326)::geography
+  END;
+$$;
+
+-- Sitter position for the nearby verified-sitter search: get_verified_sitters' nearby mode
+-- sends ST_DWithin(u.location_geo, ...) as a top-level condition so this GiST index can
+-- answer the radius search
+ALTER TABLE users ADD COLUMN IF NOT EXISTS location_geo geography(Point, 4326)
+  GENERATED ALWAYS AS (user_location_geo(latitude, longitude)) STORED;
+CREATE INDEX IF NOT EXISTS idx_users_sitter_geo ON users USING GIST (location_geo)
+WHERE role = 'sitter' AND is_verified = TRUE AND is_active = TRUE;
+
+-- Session discovery feed for sitters: open requests plus invites addressed to the caller,
+-- invites pinned first, then by start_time. City-scoped requests must match the sitter's
+-- city (p_city, else users.city); requests or sitters without a city are not filtered.
+-- Nearby is a radius search around the sitter's position (p_lat/p_lon, else
+-- users.latitude/longitude): requests within p_max_distance (default 25 km) and within their
+-- own max_distance_km, plus nearby requests without coordinates. A sitter with no position
+-- gets no nearby requests at all.
+-- SECURITY DEFINER because the sessions read policy only exposes sessions a sitter is
+-- already assigned to; visibility is enforced here.
+-- Each scope is its own branch with plain conditions, so every branch can walk its index
+-- in start_time order and stop after p_limit rows: invites via idx_sessions_open_invites,
+-- city via idx_sessions_requested_city, nearby via idx_sessions_requested_geo, nationwide
+-- and the no-city/no-coordinates leftovers via idx_sessions_open_scope_start.
+DROP FUNCTION IF EXISTS discover_sessions(TEXT, NUMERIC, TEXT, INTEGER);
+CREATE OR REPLACE FUNCTION discover_sessions(
+  p_scope TEXT DEFAULT NULL,
+  p_max_distance NUMERIC DEFAULT NULL,
+  p_city TEXT DEFAULT NULL,
+  p_limit INTEGER DEFAULT 100,
+  p_lat DOUBLE PRECISION DEFAULT NULL,
+  p_lon DOUBLE PRECISION DEFAULT NULL
+)
+RETURNS SETOF sessions
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, extensions
+STABLE
+AS $$
+DECLARE
+  v_uid UUID := auth.uid();
+  v_city TEXT;
+  v_lat DOUBLE PRECISION;
+  v_lon DOUBLE PRECISION;
+  v_geo geography;
+  -- Shared head and tail of each open-request branch ($3 = rows still to fill)
+  v_open CONSTANT TEXT := '(SELECT s.* FROM sessions s WHERE s.status = ''requested'''
+    || ' AND (s.expires_at IS NULL OR s.expires_at > NOW()) AND ';
+  v_order CONSTANT TEXT := ' ORDER BY s.start_time LIMIT $3)';
+  v_branches TEXT[] := '{}';
+  v_found INTEGER := 0;
+BEGIN
+  IF get_user_role(v_uid) IS DISTINCT FROM 'sitter' THEN
+    RETURN;
+  END IF;
+
+  SELECT lower(COALESCE(p_city, u.city)),
+         COALESCE(p_lat, u.latitude::float8),
+         COALESCE(p_lon, u.longitude::float8)
+  INTO v_city, v_lat, v_lon
+  FROM users u WHERE u.id = v_uid;
+  IF v_lat IS NOT NULL AND v_lon IS NOT NULL THEN
+    v_geo := ST_SetSRID(ST_MakePoint(v_lon, v_lat), 4326)::geography;
+  END IF;
+
+  -- Invites to this sitter come first
+  IF p_scope IS NULL OR p_scope = 'invite' THEN
+    RETURN QUERY
+      SELECT s.* FROM sessions s
+      WHERE s.status = 'requested'
+        AND s.search_scope = 'invite'
+        AND s.sitter_id = v_uid
+        AND (s.expires_at IS NULL OR s.expires_at > NOW())
+      ORDER BY s.start_time
+      LIMIT p_limit;
+    GET DIAGNOSTICS v_found = ROW_COUNT;
+  END IF;
+
+  IF p_scope = 'invite' OR v_found >= p_limit THEN
+    RETURN;
+  END IF;
+
+  IF (p_scope IS NULL OR p_scope = 'nearby') AND v_geo IS NOT NULL THEN
+    v_branches := v_branches || (v_open || 's.search_scope = ''nearby'''
+      || ' AND ST_DWithin(s.location_geo, $2, $4)'
+      || ' AND (s.max_distance_km IS NULL'
+      || ' OR ST_DWithin(s.location_geo, $2, s.max_distance_km * 1000))' || v_order);
+    v_branches := v_branches || (v_open
+      || 's.search_scope = ''nearby'' AND s.location_geo IS NULL' || v_order);
+  END IF;
+
+  IF p_scope IS NULL OR p_scope = 'city' THEN
+    IF v_city IS NULL THEN
+      v_branches := v_branches || (v_open || 's.search_scope = ''city''' || v_order);
+    ELSE
+      v_branches := v_branches || (v_open
+        || 's.search_scope = ''city'' AND lower(s.location_city) = $1' || v_order);
+      v_branches := v_branches || (v_open
+        || 's.search_scope = ''city'' AND s.location_city IS NULL' || v_order);
+    END IF;
+  END IF;
+
+  IF p_scope IS NULL OR p_scope = 'nationwide' THEN
+    v_branches := v_branches || (v_open || 's.search_scope = ''nationwide''' || v_order);
+  END IF;
+
+  IF p_scope IS NULL THEN
+    v_branches := v_branches || (v_open || 's.search_scope IS NULL' || v_order);
+  END IF;
+
+  IF cardinality(v_branches) = 0 THEN
+    RETURN;
+  END IF;
+
+  RETURN QUERY EXECUTE
+    'SELECT o.* FROM (' || array_to_string(v_branches, ' UNION ALL ')
+    || ') o ORDER BY o.start_time LIMIT $3'
+    USING v_city, v_geo, p_limit - v_found,
+          (COALESCE(p_max_distance, 25) * 1000)::float8;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION discover_sessions(TEXT, NUMERIC, TEXT, INTEGER, DOUBLE PRECISION, DOUBLE PRECISION) TO authenticated;
+
+-- Verified sitters for parents to browse (GET /api/users/sitters/verified)
+-- Invite mode lists every verified sitter (optionally just p_sitter_id); other modes list
+-- active ones, city mode in p_city only, nearby mode within p_max_distance_km of
+-- p_lat/p_lon (sitters without a saved position are left out).
+-- Keyset paged: pass the last row's created_at/id as p_after_created_at/p_after_id.
+-- SECURITY DEFINER so the scan skips the per-row users read policy; visibility matches
+-- that policy: parents and admins see verified sitters, anyone else only themselves.
+-- The query is assembled per call with only the conditions that apply, so the keyset,
+-- city and radius tests are plain index conditions (a "p_x IS NULL OR ..." catch-all
+-- would get a generic plan that filters them row by row instead).
+DROP FUNCTION IF EXISTS get_verified_sitters(TEXT, UUID, TEXT, INTEGER);
+DROP FUNCTION IF EXISTS get_verified_sitters(TEXT, UUID, TEXT, INTEGER, TIMESTAMPTZ, UUID);
+CREATE OR REPLACE FUNCTION get_verified_sitters(
+  p_mode TEXT DEFAULT NULL,
+  p_sitter_id UUID DEFAULT NULL,
+  p_city TEXT DEFAULT NULL,
+  p_limit INTEGER DEFAULT 100,
+  p_after_created_at TIMESTAMPTZ DEFAULT NULL,
+  p_after_id UUID DEFAULT NULL,
+  p_lat DOUBLE PRECISION DEFAULT NULL,
+  p_lon DOUBLE PRECISION DEFAULT NULL,
+  p_max_distance_km NUMERIC DEFAULT 10
+)
+RETURNS SETOF users
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, extensions
+STABLE
+AS $$
+DECLARE
+  v_uid UUID := auth.uid();
+  v_sql TEXT := 'SELECT u.* FROM users u WHERE u.role = ''sitter'' AND u.is_verified = TRUE';
+BEGIN
+  IF COALESCE(get_user_role(v_uid), '') NOT IN ('parent', 'admin') THEN
+    v_sql := v_sql || ' AND u.id = $1';
+  END IF;
+
+  IF p_mode = 'invite' THEN
+    IF p_sitter_id IS NOT NULL THEN
+      v_sql := v_sql || ' AND u.id = $2';
+    END IF;
+  ELSE
+    -- idx_users_active_sitters_city / idx_users_sitter_geo / idx_users_verified_sitters_keyset
+    v_sql := v_sql || ' AND u.is_active = TRUE';
+    IF p_mode = 'city' THEN
+      v_sql := v_sql || ' AND u.city = $3';
+    ELSIF p_mode = 'nearby' THEN
+      v_sql := v_sql || ' AND ST_DWithin(u.location_geo,'
+        || ' ST_SetSRID(ST_MakePoint($7, $6), 4326)::geography, $8 * 1000)';
+    END IF;
+  END IF;
+
+  IF p_after_created_at IS NOT NULL THEN
+    v_sql := v_sql || ' AND (u.created_at, u.id) < ($4, $5)';
+  END IF;
+
+  RETURN QUERY EXECUTE v_sql || ' ORDER BY u.created_at DESC, u.id DESC LIMIT $9'
+    USING v_uid, p_sitter_id, p_city, p_after_created_at, p_after_id,
+          p_lat, p_lon, p_max_distance_km, p_limit;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION get_verified_sitters(TEXT, UUID, TEXT, INTEGER, TIMESTAMPTZ, UUID, DOUBLE PRECISION, DOUBLE PRECISION, NUMERIC) TO authenticated;
+
 -- Users: Users can read their own profile, admins can read all, parents can read verified sitters
+-- auth.uid() and get_user_role() are wrapped in (SELECT ...) so Postgres evaluates them once
+-- per query as an InitPlan instead of once per row (matters for the verified-sitter scan).
 DROP POLICY IF EXISTS "Users can read own profile" ON users;
 CREATE POLICY "Users can read own profile" ON users
   FOR SELECT USING (
-    auth.uid() = id 
-    OR get_user_role(auth.uid()) = 'admin'
+    (SELECT auth.uid()) = id
+    OR (SELECT get_user_role(auth.uid())) = 'admin'
     OR (
       -- Parents can read verified sitter profiles (for browsing and selecting)
-      get_user_role(auth.uid()) = 'parent'
+      (SELECT get_user_role(auth.uid())) = 'parent'
       AND users.role = 'sitter'
       AND users.is_verified = true
     )
@@ -476,12 +808,12 @@ CREATE POLICY "Users can read own profile" ON users
 -- Note: Most inserts are handled by create_user_profile function and handle_auth_user_created trigger
 DROP POLICY IF EXISTS "Users can insert own profile" ON users;
 CREATE POLICY "Users can insert own profile" ON users
-  FOR INSERT WITH CHECK (auth.uid() = id);
+  FOR INSERT WITH CHECK ((SELECT auth.uid()) = id);
 
 DROP POLICY IF EXISTS "Users can update own profile" ON users;
 CREATE POLICY "Users can update own profile" ON users
-  FOR UPDATE USING (auth.uid() = id)
-  WITH CHECK (auth.uid() = id);
+  FOR UPDATE USING ((SELECT auth.uid()) = id)
+  WITH CHECK ((SELECT auth.uid()) = id);
 
 -- Children: Parents can read/write their own children
 -- Drop existing policy if it exists